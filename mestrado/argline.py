@@ -9,6 +9,7 @@ import sys
 
 # variáveis globais
 OUTPUTDIR = None    # caminho para diretório de arquivos gerados
+JOBS = 1            # número de processos utilizados pelos scripts
 
 def _configLogLevel(log_level):
     """Configuração do nível de log.
@@ -57,6 +58,20 @@ def _configOutputDir(path):
         sys.exit(2)
 
 
+def _configJobs(value):
+    """Configura o número de processos utilizados pelos scripts."""
+    global JOBS
+    try:
+        JOBS = int(value)
+    except ValueError:
+        JOBS = 0
+
+    if JOBS < 1:
+        print ("Número de processos ('--jobs') deve ser um inteiro positivo: "
+               "{}".format(value))
+        sys.exit(2)
+
+
 def config():
     """Cria e configura o arquivo de log com argumentos da linha de comando.
 
@@ -69,7 +84,8 @@ def config():
     long_options = ["help",
                     "loglevel=",
                     "logfile=",
-                    "outputdir="]
+                    "outputdir=",
+                    "jobs="]
     try:
         opts, args = getopt.getopt(sys.argv[1:], options, long_options)
     except getopt.GetoptError:
@@ -91,6 +107,8 @@ def config():
             _configLogFile(value)
         if opt in ('--outputdir'):
             _configOutputDir(value)
+        if opt in ('--jobs'):
+            _configJobs(value)
 
 
 def usage():
@@ -105,4 +123,8 @@ def usage():
     print "\t\tdefault: 'info'."
     print "\n\t--logfile:\toutput log file."
     print "\t\tdefault: console."
+    print "\n\t--outputdir:\tdirectory for generated files."
+    print "\t\tdefault: current directory."
+    print "\n\t--jobs:\tnumber of worker processes."
+    print "\t\tdefault: 1."
     sys.exit(2)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import chbmit
+import datetime
+import json
+import logging
+import numpy as np
+import os
+import platform
+import stft
+import timeit
+
+
+# configurações da STFT avaliadas (tamanho da janela, deslocamento)
+STFT_WSIZES = [256, 512, 1024]
+STFT_HOPS = [32, 128, 256]
+
+
+def syntheticRecord(nchannels=23, sfreq=256, duration=3600, seed=0):
+    """Gera um sinal sintético com as dimensões de um arquivo da base CHBMIT.
+
+    Parâmetros:
+    -----------
+    nchannels: int (default: 23)
+        número de canais do sinal.
+    sfreq: float (default: 256)
+        frequência de amostragem (em Hertz).
+    duration: float (default: 3600)
+        duração do sinal (em segundos).
+    seed: int (default: 0)
+        semente do gerador de números aleatórios.
+
+    Retorno:
+    --------
+    np.ndarray:
+        sinal com formato (canais, amostras), composto por ruído branco e
+        senóides nas bandas delta, theta, alpha e beta.
+    """
+    rng = np.random.RandomState(seed)
+    nsamples = int(sfreq*duration)
+    t = np.arange(nsamples)/float(sfreq)
+
+    signal = rng.randn(nchannels, nsamples)*10
+    for f in (2, 6, 10, 20):
+        phase = rng.uniform(0, 2*np.pi, (nchannels, 1))
+        signal += 50*np.sin(2*np.pi*f*t + phase)
+    return signal
+
+
+def _timeit(func, repeat):
+    """Retorna o menor tempo (em segundos) de *repeat* execuções de *func*."""
+    best = None
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        func()
+        elapsed = timeit.default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def _fullSpectrum(data, sfreq):
+    """Reproduz o cálculo original (legado) do espectro de potência de
+    *chbmit.applyFourier*, em float64 e um canal por vez."""
+    avg_ch = np.mean(data, axis=0)
+    pspect = []
+    for channel in list(data) + [avg_ch]:
+        ft = np.fft.rfft(channel)
+        pspect.append(abs(ft)**2)
+    freq = np.fft.rfftfreq(data.shape[-1], d=1.0/sfreq)
+    return pspect, freq
+
+
+def _bandSlicing(pspect, freq):
+    """Reproduz a seleção original (legada) de bandas de
+    *chbmit.applyFourier*."""
+    wave_band = stft.bandSlices(freq, chbmit.WAVE_BANDS)
+    for ws, wf in wave_band:
+        [pspect[i][ws:wf] for i in range(len(pspect))]
+
+
+def _applyFourierSpectrum(data, sfreq):
+    """Reproduz o cálculo do espectro de potência de *chbmit.applyFourier*
+    (ver *chbmit._computeSpectrum*, psd_mode='fft')."""
+    pspect, _, nfft = stft.powerSpectrum(data, sfreq, pad=True, threads=1)
+    chbmit._bandTable(nfft, sfreq)
+    return pspect, nfft
+
+
+def _applyFourierBands(pspect, nfft, sfreq):
+    """Reproduz o cálculo da potência por banda de *chbmit.applyFourier*
+    (ver *chbmit._bandPower*)."""
+    _, wave_band = chbmit._bandTable(nfft, sfreq)
+    return chbmit._bandPower(pspect, wave_band)
+
+
+def _stftChannels(data, wsize, hop):
+    """Calcula a STFT de cada canal, descartando cada resultado antes do
+    próximo canal (os coeficientes de todos os canais de um sinal de 1 hora
+    ocupariam alguns GB de memória)."""
+    for channel in data:
+        stft.stft(channel, wsize, hop)
+
+
+def runBenchmarks(nchannels=23, sfreq=256, duration=3600, repeat=3):
+    """Mede o tempo de execução das funções críticas da transformada (Fourier).
+
+    São medidos: *stft.stft* sobre todos os canais do sinal, um canal por
+    vez, para cada combinação de *STFT_WSIZES* e *STFT_HOPS*;
+    *stft.stftfreq*; o espectro de potência do sinal completo e a potência
+    por banda, como realizados em *chbmit.applyFourier*; as versões
+    originais (legadas) desses cálculos; e *stft.powerSpectrum*.
+
+    Parâmetros:
+    -----------
+    nchannels: int (default: 23)
+        número de canais do sinal sintético.
+    sfreq: float (default: 256)
+        frequência de amostragem (em Hertz).
+    duration: float (default: 3600)
+        duração do sinal sintético (em segundos).
+    repeat: int (default: 3)
+        número de repetições de cada medida. O menor tempo é mantido.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com as informações da execução ('info') e os tempos, em
+        segundos, de cada medida ('results').
+    """
+    logging.info("Gerando sinal sintético: {} canais, {}Hz, {}s."
+                 "".format(nchannels, sfreq, duration))
+    data = syntheticRecord(nchannels, sfreq, duration)
+
+    results = {}
+    for wsize in STFT_WSIZES:
+        for hop in STFT_HOPS:
+            name = "stft.stft[wsize={},hop={}]".format(wsize, hop)
+            logging.info("Medindo {}".format(name))
+            results[name] = _timeit(lambda: _stftChannels(data, wsize, hop),
+                                    repeat)
+
+        name = "stft.stftfreq[wsize={}]".format(wsize)
+        results[name] = _timeit(lambda: stft.stftfreq(wsize, sfreq), repeat)
+
+    logging.info("Medindo espectro de potência completo.")
+    results["applyFourier.spectrum"] = _timeit(
+        lambda: _applyFourierSpectrum(data, sfreq), repeat)
+    results["legacy.applyFourier.spectrum"] = _timeit(
+        lambda: _fullSpectrum(data, sfreq), repeat)
+
+    logging.info("Medindo stft.powerSpectrum.")
+    results["stft.powerSpectrum"] = _timeit(
+        lambda: stft.powerSpectrum(data, sfreq), repeat)
+
+    logging.info("Medindo potência por banda.")
+    pspect, nfft = _applyFourierSpectrum(data, sfreq)
+    results["applyFourier.bands"] = _timeit(
+        lambda: _applyFourierBands(pspect, nfft, sfreq), repeat)
+
+    pspect, freq = _fullSpectrum(data, sfreq)
+    results["legacy.applyFourier.bands"] = _timeit(
+        lambda: _bandSlicing(pspect, freq), repeat)
+
+    info = {'date': datetime.datetime.now().isoformat(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'nchannels': nchannels,
+            'sfreq': sfreq,
+            'duration': duration,
+            'repeat': repeat}
+
+    return {'info': info, 'results': results}
+
+
+def compareBenchmarks(current, previous, threshold=1.2):
+    """Compara duas execuções, retornando as medidas que ficaram mais lentas.
+
+    Parâmetros:
+    -----------
+    current: dict
+        resultado de *runBenchmarks* da execução atual.
+    previous: dict
+        resultado de *runBenchmarks* de uma execução anterior.
+    threshold: float (default: 1.2)
+        razão mínima entre os tempos (atual/anterior) para que uma medida
+        seja considerada uma regressão.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com as medidas em regressão (key) e a razão entre os
+        tempos (value).
+    """
+    regressions = {}
+    for name, elapsed in current['results'].items():
+        if name not in previous['results']:
+            continue
+
+        ratio = elapsed/previous['results'][name]
+        if ratio >= threshold:
+            logging.warning("REGRESSÃO: {} ({:.2f}x mais lento)"
+                            "".format(name, ratio))
+            regressions[name] = ratio
+        else:
+            logging.info("{}: {:.4f}s ({:.2f}x)".format(name, elapsed, ratio))
+    return regressions
+
+
+def saveBenchmarks(results, save_path):
+    """Salva o resultado de *runBenchmarks* em um arquivo JSON.
+
+    Caso o arquivo já exista, a execução anterior é comparada com a atual
+    (ver *compareBenchmarks*) antes de ser substituída.
+
+    Parâmetros:
+    -----------
+    results: dict
+        resultado de *runBenchmarks*.
+    save_path: str
+        caminho para o arquivo JSON.
+
+    Retorno:
+    --------
+    dict:
+        medidas em regressão em relação à execução anterior (ver
+        *compareBenchmarks*).
+    """
+    regressions = {}
+    if os.path.exists(save_path):
+        logging.info("Comparando com execução anterior: {}".format(save_path))
+        with open(save_path) as f:
+            previous = json.load(f)
+        regressions = compareBenchmarks(results, previous)
+
+    logging.info("Salvando resultados em: {}".format(save_path))
+    with open(save_path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    return regressions
@@ -1,15 +1,70 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import ConfigParser
+import csv
 import datasetPathManipulation as dpm
+import edfHeader
 import itertools as itt
+import json
 import logging
 import mne
+import multiprocessing
 import numpy as np
 import os
 import pathManipulation as pm
+import patientTimeline
 import plotModels
+import Queue
+import re
+import resultCache
+import scipy.signal
+import seizureIndex
+import stft
+import threading
+
+
+# bandas de frequência (em Hertz) das ondas cerebrais, na forma (fmin, fmax).
+# A primeira banda corresponde ao espectro completo. Ver *stft.bandSlices*.
+WAVE_BANDS = [(0, None),    # todas as frequências
+              (0, 4),       # delta waves [0~4Hz]
+              (4, 8),       # theta waves [4~8Hz]
+              (8, 14),      # alpha waves [8~14Hz]
+              (14, 30),     # beta waves [14~30Hz]
+              (30, None)]   # gamma waves [>30Hz]
+
+# padrões dos nomes das imagens de *applyFourier*, na ordem de *WAVE_BANDS*
+WAVE_PATTERNS = ['', '1Delta', '2Theta', '3Alpha', '4Beta', '5Gamma']
+
+# parâmetros de plotagem das imagens de *applyFourier*
+FOURIER_PLOT = {'dpi': 600, 'linewidth': 0.2, 'ytickline_visible': True,
+                'yticklabel_visible': True, 'ytick_bins': 4, 'figsize': None,
+                'borderwidth': 0.2, 'xtick_size': 1.5, 'ytick_size': 1,
+                'xlabel': "Frequências (Hz)", 'decimate': True}
+FOURIER_TITLE = "Espectro de Potência {}: {}"
+
+# classes dos trechos de sinal, em relação às crises
+INTERICTAL = 0  # distante das crises
+PREICTAL = 1    # anterior ao início de uma crise
+ICTAL = 2       # durante uma crise
+POSTICTAL = 3   # posterior ao término de uma crise
+
+# tipo dos registros do índice de épocas (ver *extractEpochs*)
+EPOCH_INDEX_DTYPE = [('patient', 'S8'), ('file', 'S16'), ('start', 'f8'),
+                     ('label', 'i1')]
+
+# tabelas de bandas já calculadas, indexadas por (nfft, sfreq). Ver _bandTable
+_BAND_TABLES = {}
+
+# padrões das linhas dos arquivos de sumário (ver *_parseSummary*)
+_SUMMARY_FILE = re.compile(r'File Name:\s*(\S+)')
+_SUMMARY_CLOCK = re.compile(r'File (Start|End) Time:\s*(\S+)')
+_SUMMARY_NSEIZURES = re.compile(r'Number of Seizures in File:\s*(\d+)')
+_SUMMARY_SEIZURE = re.compile(r'Seizure\s*\d*\s*(Start|End) Time:\s*(\d+)')
+_SUMMARY_MONTAGE = re.compile(r'Channels (in EDF Files|changed)')
+_SUMMARY_CHANNEL = re.compile(r'Channel\s*\d+:\s*(\S+)')
+
+# sumários já analisados, indexados pelo caminho (ver *parseSummaries*)
+_SUMMARY_CACHE = {}
 
 
 def summaryFileParser(summary_path):
@@ -41,6 +96,10 @@ def summaryFileParser(summary_path):
                 (em segundos)
             ['annot_end']: lista com os tempos de término das anotações
                 (em segundos)
+            ['start_time'], ['end_time']: horários de início e término da
+                gravação (str, 'hh:mm:ss'), ou None
+            ['montage']: índice da listagem de canais do arquivo (ver
+                *parseSummaries*), ou None
 
     Nota:
     -----
@@ -69,70 +128,7 @@ def summaryFileParser(summary_path):
     else:
         logging.debug("Sumário encontrado.")
 
-    logging.debug("Abrindo sumário.")
-    summary_file = open(summary_path)
-    summary_data = {}
-
-    # percorre todo o arquivo, linha por linha, procurando por informações
-    # sobre as anotações (crises) de cada arquivo .edf
-    logging.debug("Percorrendo linhas do sumário")
-    line = summary_file.readline()
-    while line != '':
-        # procura a linha que contém o nome do arquivo .edf
-        logging.debug("Procurando linha com nome do arquivo edf.")
-        if line.find("File Name:") >= 0:
-            logging.debug("Extraindo nome do arquivo edf.")
-            fname = line.split()[-1]    # extrai, da linha, o nome do arquivo
-            seizures_start = []         # tempos de início das crises
-            seizures_end = []           # tempos de término das crises
-
-            # procura pelo número de críses presentes no arquivo 'fname' apenas
-            logging.debug(("Procurando informações sobre as crises em ",
-                           "{}".format(fname)))
-            while line.find("Number of Seizures in File:") < 0:
-                line = summary_file.readline()
-
-            nseizures = int(line.split()[-1])
-            logging.debug("Número de crises: {}.".format(nseizures))
-
-            # extrai informações sobre cada crise presente no sinal (início e
-            # fim). Existem dois tipos de padão nos arquivos summary.
-            for seiz_i in range(1, nseizures+1):
-                pattern1 = "Seizure Start Time:"
-                pattern2 = "Seizure "+str(seiz_i)+" Start Time:"
-
-                # extrai informação de início da crise 'seiz_i'
-                while line.find(pattern1) < 0 and line.find(pattern2) < 0:
-                    line = summary_file.readline()
-
-                seizures_start.append(int(line.split()[-2]))
-
-                pattern1 = "Seizure End Time:"
-                pattern2 = "Seizure "+str(seiz_i)+" End Time:"
-                # extrai informação de término da crise 'seiz_i'
-                while line.find(pattern1) < 0 and line.find(pattern2) < 0:
-                    line = summary_file.readline()
-
-                seizures_end.append(int(line.split()[-2]))
-
-            # as anotações dos arquivos .edf estão ordenadas e aparecem apenas
-            # uma vez. Por isso, não devem existir chaves anteriores com mesmos
-            # nomes
-            if fname in summary_data:
-                errormsg = ("ERRO: Não deveria conter esta chave "
-                            "(key: {})".format(fname))
-                logging.error(errormsg)
-                raise ValueError(errormsg)
-
-            logging.debug(("Criando entrada no dicionário ",
-                           "com informações extraídas."))
-
-            summary_data[fname] = {}
-            summary_data[fname]["annot_num"] = nseizures
-            summary_data[fname]["annot_start"] = seizures_start
-            summary_data[fname]["annot_end"] = seizures_end
-
-        line = summary_file.readline()
+    summary_data = _parseSummary(summary_path)['files']
 
     if len(summary_data) == 0:
         logging.warning(("Retornando dicionário vazio. "
@@ -142,7 +138,147 @@ def summaryFileParser(summary_path):
     return summary_data
 
 
-def openEDF(edf_path, annot_dict=None):
+def _parseSummary(summary_path):
+    """Analisa um arquivo de sumário em uma única passagem.
+
+    Parâmetros:
+    -----------
+    summary_path: str
+        caminho para o arquivo de sumário.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com as chaves:
+        ['montages']: lista com as listagens de canais do sumário, na ordem
+            em que aparecem ('Channels in EDF Files' e 'Channels changed').
+        ['files']: dicionário com os nomes dos arquivos EDF (key) e suas
+            informações (value), no formato de *summaryFileParser*.
+    """
+    montages = []
+    files = {}
+    entry = None
+    channels = None
+    with open(summary_path) as summary_file:
+        for line in summary_file:
+            line = line.strip()
+            if not line:
+                continue
+
+            match = _SUMMARY_FILE.match(line)
+            if match:
+                fname = match.group(1)
+                # as anotações dos arquivos .edf aparecem apenas uma vez
+                if fname in files:
+                    errormsg = ("ERRO: Não deveria conter esta chave "
+                                "(key: {})".format(fname))
+                    logging.error(errormsg)
+                    raise ValueError(errormsg)
+
+                entry = {'annot_num': 0, 'annot_start': [], 'annot_end': [],
+                         'start_time': None, 'end_time': None,
+                         'montage': len(montages)-1 if montages else None}
+                files[fname] = entry
+                channels = None
+                continue
+
+            match = _SUMMARY_CHANNEL.match(line)
+            if match:
+                if channels is None:
+                    channels = []
+                    montages.append(channels)
+                channels.append(match.group(1))
+                continue
+
+            if _SUMMARY_MONTAGE.match(line):
+                channels = None
+                continue
+
+            if entry is None:
+                continue
+
+            match = _SUMMARY_SEIZURE.match(line)
+            if match:
+                key = 'annot_start' if match.group(1) == 'Start' else \
+                    'annot_end'
+                entry[key].append(int(match.group(2)))
+                continue
+
+            match = _SUMMARY_CLOCK.match(line)
+            if match:
+                key = 'start_time' if match.group(1) == 'Start' else \
+                    'end_time'
+                entry[key] = match.group(2)
+                continue
+
+            match = _SUMMARY_NSEIZURES.match(line)
+            if match:
+                entry['annot_num'] = int(match.group(1))
+
+    for fname, entry in files.items():
+        if not (entry['annot_num'] == len(entry['annot_start']) ==
+                len(entry['annot_end'])):
+            logging.warning("Número de crises inconsistente em {} ({})"
+                            "".format(fname, summary_path))
+
+    return {'montages': montages, 'files': files}
+
+
+def parseSummaries(summary_paths, cache_path=None):
+    """Analisa um conjunto de arquivos de sumário, com resultados em cache.
+
+    Cada sumário é analisado em uma única passagem (ver *_parseSummary*) e o
+    resultado é memorizado, em memória e, opcionalmente, em disco, indexado
+    pelo tamanho e data de modificação do arquivo. Apenas os sumários novos
+    ou modificados são analisados novamente.
+
+    Parâmetros:
+    -----------
+    summary_paths: list de str
+        caminhos para os arquivos de sumário.
+    cache_path: str (default: None)
+        caminho para o arquivo (JSON) com os sumários já analisados. Caso
+        None, os resultados são memorizados apenas em memória.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com os caminhos dos sumários (key) e seus conteúdos
+        (value), no formato de *_parseSummary*.
+    """
+    disk_cache = None
+    changed = False
+    ret = {}
+    for summary_path in summary_paths:
+        signature = resultCache.fileSignature(summary_path)
+
+        entry = _SUMMARY_CACHE.get(summary_path)
+        if entry is None or entry['signature'] != signature:
+            if disk_cache is None:
+                disk_cache = {}
+                if cache_path is not None and os.path.exists(cache_path):
+                    with open(cache_path) as f:
+                        disk_cache = json.load(f)
+
+            entry = disk_cache.get(summary_path)
+            if entry is None or entry['signature'] != signature:
+                logging.debug("Analisando sumário: {}".format(summary_path))
+                entry = {'signature': signature,
+                         'summary': _parseSummary(summary_path)}
+                disk_cache[summary_path] = entry
+                changed = True
+            _SUMMARY_CACHE[summary_path] = entry
+
+        ret[summary_path] = entry['summary']
+
+    if changed and cache_path is not None:
+        logging.info("Salvando sumários analisados em: {}".format(cache_path))
+        resultCache.saveJSON(cache_path, disk_cache)
+
+    return ret
+
+
+def openEDF(edf_path, annot_dict=None, channels=None, tmin=None, tmax=None):
     """Abre um arquivo EDF devidamente anotado. Retornando um objeto Raw.
 
     Faz a leitura de um arquivo EDF, utilizando a biblioteca mne. Recebe o
@@ -158,6 +294,15 @@ def openEDF(edf_path, annot_dict=None):
         dicionário que contém as informações sobre as anotações do sinal. Para
         mais informações sobre o formato (estrutura) do dicionário ver
         *summaryFileParser*.
+    channels: list de str (default: None)
+        rótulos dos canais mantidos no objeto retornado. Caso None, todos os
+        canais são mantidos.
+    tmin: float (default: None)
+        início (em segundos) do intervalo de tempo carregado. Caso None, a
+        leitura começa no início do sinal.
+    tmax: float (default: None)
+        fim (em segundos) do intervalo de tempo carregado. Caso None, a
+        leitura segue até o fim do sinal.
 
     Retorno:
     --------
@@ -170,6 +315,12 @@ def openEDF(edf_path, annot_dict=None):
     O canal de estímulo ('STI 014') é criado pela biblioteca mne de forma
     automatica, devido à uma replicação do canal T8-P8 na base de dados. Com
     isso, quando aplicável, este canal de estímulo é removido.
+    O arquivo é aberto sem a leitura dos dados e apenas o intervalo de tempo
+    selecionado é carregado em memória, lendo do disco apenas os registros
+    de dados (data records) do intervalo. A seleção dos canais é feita após
+    o carregamento (exigência da biblioteca mne) e mantém a ordem dos canais
+    do arquivo. Os tempos das anotações são ajustados ao intervalo
+    carregado.
 """
     logging.debug("Executando openEDF para {}".format(edf_path))
 
@@ -179,16 +330,45 @@ def openEDF(edf_path, annot_dict=None):
         logging.error(errormsg)
         raise ValueError(errormsg)
 
-    # abre o arquivo edf
-    raw = mne.io.read_raw_edf(edf_path, preload=True, verbose=False)
-
+    # abre o arquivo edf, sem carregar os dados
+    raw = mne.io.read_raw_edf(edf_path, preload=False, verbose=False)
+
+    if channels is not None:
+        missing = [ch for ch in channels if ch not in raw.ch_names]
+        if missing:
+            errormsg = ("Canais não encontrados em {}: {}"
+                        "".format(edf_path, missing))
+            logging.error(errormsg)
+            raise ValueError(errormsg)
+
+    # o recorte no tempo é permitido antes do carregamento e limita os
+    # registros lidos do disco
+    tmin = 0.0 if tmin is None else float(tmin)
+    if tmin > 0 or tmax is not None:
+        if tmax is not None and tmax <= tmin:
+            errormsg = ("Intervalo de tempo inválido: tmin={}, tmax={}"
+                        "".format(tmin, tmax))
+            logging.error(errormsg)
+            raise ValueError(errormsg)
+
+        logging.debug("Selecionando intervalo: [{}, {}]".format(tmin, tmax))
+        raw.crop(tmin=tmin, tmax=tmax, copy=False)
+
+    logging.debug("Carregando dados selecionados.")
+    raw.load_data(verbose=False)
+
+    # a remoção e seleção de canais exigem os dados carregados
     logging.debug("Removendo canal de estímulo criado pela biblioteca mne.")
-    try:
+    if 'STI 014' in raw.ch_names:
         raw.drop_channels(['STI 014'], copy=False)
         logging.debug("Canal de estímulo removido.")
-    except:
+    else:
         logging.warning("{} não contém canal de estímulo".format(edf_path))
 
+    if channels is not None:
+        logging.debug("Selecionando canais: {}".format(channels))
+        raw.pick_channels(channels, copy=False)
+
     # verifica se não exite um dicionário de anotações
     logging.debug("Verificando anotações.")
     if annot_dict is None:
@@ -200,19 +380,80 @@ def openEDF(edf_path, annot_dict=None):
     logging.debug("Inserindo anotações no sinal.")
     dict_key = edf_path.split('/')[-1]
     if dict_key in annot_dict and annot_dict[dict_key]['annot_num'] > 0:
-        start = annot_dict[dict_key]['annot_start']
-        end = annot_dict[dict_key]['annot_end']
+        # tempos das anotações relativos ao intervalo carregado
+        stop = tmin + len(raw)/raw.info['sfreq']
+        start = []
+        end = []
+        for s, f in zip(annot_dict[dict_key]['annot_start'],
+                        annot_dict[dict_key]['annot_end']):
+            if f > tmin and s < stop:
+                start.append(max(s, tmin) - tmin)
+                end.append(min(f, stop) - tmin)
         duration = [f-s for s, f in zip(start, end)]
 
-        annot = mne.Annotations(start, duration, "seizures")
-        raw.annotations = annot
+        if start:
+            annot = mne.Annotations(start, duration, "seizures")
+            raw.annotations = annot
     logging.debug("Anotações inseridas.")
 
     logging.debug("Retornando objeto Raw com anotações.")
     return raw
 
 
-def verifyCHBMITFiles():
+def _verifyEDF(edf_path, header_first=True):
+    """Verifica se um arquivo EDF abre corretamente, retornando um veredito.
+
+    Caso *header_first* seja True, verifica primeiro apenas o cabeçalho do
+    arquivo (ver *edfHeader.readEDFHeader*): rótulos de canais repetidos ou
+    vazios e tamanho dos dados incompatível com o cabeçalho (arquivo
+    truncado). O arquivo é aberto com a biblioteca *mne* apenas quando o
+    cabeçalho apresenta rótulos problemáticos. Definida no nível do módulo
+    para que possa ser executada em outros processos.
+
+    Parâmetros:
+    -----------
+    edf_path: str
+        caminho absoluto para o arquivo EDF.
+    header_first: True|False (default: True)
+        se False, o arquivo é sempre aberto com a biblioteca *mne*.
+
+    Retorno:
+    --------
+    (str, bool, str):
+        caminho do arquivo, booleano indicando se o arquivo pode ser aberto e
+        descrição do problema encontrado (vazia caso não exista).
+    """
+    reason = ''
+    if header_first:
+        try:
+            header = edfHeader.readEDFHeader(edf_path)
+        except (ValueError, IOError):
+            return edf_path, False, "cabeçalho inválido"
+
+        if header['size'] < header['expected_size']:
+            return edf_path, False, ("arquivo truncado ({} de {} bytes)"
+                                     "".format(header['size'],
+                                               header['expected_size']))
+
+        problems = []
+        if header['duplicated']:
+            problems.append("canais repetidos: {}"
+                            "".format(",".join(header['duplicated'])))
+        if any(l in ('', '-', '.') for l in header['labels']):
+            problems.append("canais sem rótulo")
+
+        if not problems:
+            return edf_path, True, ''
+        reason = "; ".join(problems)
+
+    try:
+        mne.io.read_raw_edf(edf_path, verbose=False)
+    except:
+        return edf_path, False, reason or "erro ao abrir (mne)"
+    return edf_path, True, reason
+
+
+def verifyCHBMITFiles(header_first=True, jobs=1, report_path=None):
     """ Verifica quais arquivos EDF da base de dados CHBMIT abrem corretamente.
 
     Função desenvolvida para verificar quais arquivos da base de dados CHBMIT
@@ -221,14 +462,30 @@ def verifyCHBMITFiles():
     biblioteca *mne*. Ao verificar quais arquivos podem, ou não, serem abertos,
     imprime em um arquivo de log (se definido) quais arquivos puderam ser
     abertos e quais não foram.
+
+    Parâmetros:
+    -----------
+    header_first: True|False (default: True)
+        se True, verifica primeiro o cabeçalho de cada arquivo, abrindo com a
+        biblioteca *mne* apenas quando necessário (ver *_verifyEDF*).
+    jobs: int (default: 1)
+        número de processos utilizados na verificação dos arquivos.
+    report_path: str (default: None)
+        caminho para um arquivo CSV com o veredito de cada arquivo. Caso None,
+        o relatório não é salvo.
+
+    Retorno:
+    --------
+    list de str:
+        rótulos dos pacientes em que todos os arquivos abrem corretamente,
+        no formato da opção 'good-data' do arquivo dataset.cfg.
     """
-    # cria objeto para leitura das configurações da base CHBMIT
-    cfg = ConfigParser.ConfigParser()
-    cfg.read('dataset.cfg')
+    # catálogo (em cache) com as configurações da base CHBMIT
+    catalog = dpm.getCatalog()
 
     # verifica existência do caminho para a base de dados
-    dataset_path = cfg.get('chbmit', 'path')
-    if not os.path.exists(dataset_path):
+    dataset_path = catalog.get('chbmit', 'path')
+    if catalog.datasetPath('chbmit') is None:
         msg = ("Não foi possível encontrar a base de dados ",
                "em {}".format(dataset_path))
         logging.error(msg)
@@ -237,15 +494,15 @@ def verifyCHBMITFiles():
     logging.info("Localização da base de dados: {}\n".format(dataset_path))
 
     # seleciona as pastas de todos os pacientes (padrão: chbXX)
-    patients_label = [l for l in os.listdir(dataset_path) if not l.find("chb")]
-    patients_label.sort()
+    patients_label = [l for l in catalog.listdir(dataset_path)
+                      if not l.find("chb")]
 
     logging.debug("Pacientes encontrados:")
     for p in patients_label:
         logging.debug(p)
 
-    # lista de pacientes que todos os arquivos EDF abriram
-    good_data = []
+    # arquivos EDF de cada paciente
+    edf_files = []
     for label in patients_label:
         # seleciona apenas os arquivos .edf para o paciente *label*
         patient_path = os.path.join(dataset_path, label)
@@ -253,33 +510,242 @@ def verifyCHBMITFiles():
         logging.info("Examinando paciente em: {}".format(patient_path))
         print "Examinando paciente em: {}".format(patient_path)
 
-        edf_list = [edf for edf in os.listdir(patient_path)
+        edf_list = [edf for edf in catalog.listdir(patient_path)
                     if edf.lower().endswith(".edf")]
-        edf_list.sort()
 
         logging.debug("Arquivos EDF encontrados para: {}".format(patient_path))
         for edf in edf_list:
             logging.debug(edf)
+            edf_files.append((label, os.path.join(patient_path, edf)))
+
+    # verifica quais arquivos não podem ser abertos
+    if jobs > 1:
+        logging.info("Verificando arquivos em {} processos.".format(jobs))
+        pool = multiprocessing.Pool(jobs)
+        tasks = [pool.apply_async(_verifyEDF, (edf, header_first))
+                 for _, edf in edf_files]
+        pool.close()
+        verdicts = [task.get() for task in tasks]
+        pool.join()
+    else:
+        verdicts = [_verifyEDF(edf, header_first) for _, edf in edf_files]
 
-        # verifica quais arquivos não podem ser abertos e imprime
-        for edf in [os.path.join(patient_path, edf) for edf in edf_list]:
-            can_open = True
-            try:
-                logging.debug("Abrindo edf: {}".format(edf))
-                mne.io.read_raw_edf(edf, verbose=False)
-            except:
-                logging.warning("[Erro ao abrir]: {}".format(edf))
-                can_open = False
-
-        if can_open:
-            good_data.append(label)
+    # lista de pacientes que todos os arquivos EDF abriram
+    bad_data = set()
+    for (label, _), (edf, can_open, reason) in zip(edf_files, verdicts):
+        if not can_open:
+            logging.warning("[Erro ao abrir]: {} ({})".format(edf, reason))
+            bad_data.add(label)
+        elif reason:
+            logging.info("[Aviso]: {} ({})".format(edf, reason))
+    good_data = [label for label in patients_label if label not in bad_data]
+
+    if report_path is not None:
+        logging.info("Salvando relatório em: {}".format(report_path))
+        with open(report_path, 'wb') as f:
+            writer = csv.writer(f)
+            writer.writerow(['paciente', 'arquivo', 'abre', 'problema'])
+            for (label, _), (edf, can_open, reason) in zip(edf_files,
+                                                           verdicts):
+                writer.writerow([label, edf.split('/')[-1], int(can_open),
+                                 reason])
 
     logging.info("Arquivos não corrompidos:")
     for p in good_data:
         logging.info(p)
+    logging.info("good-data = {}".format(",".join(good_data)))
+
+    return good_data
+
+
+def indexCHBMITFiles(patients='all', index_path='chbmit_index.json'):
+    """Cria um índice com os cabeçalhos dos arquivos EDF da base CHBMIT.
+
+    Lê apenas os cabeçalhos dos arquivos EDF (ver *edfHeader.readEDFHeader*),
+    sem decodificar os sinais, registrando rótulos dos canais (incluindo os
+    repetidos, como T8-P8), frequência de amostragem, número de registros,
+    duração e posição dos dados. O índice é salvo em um único arquivo e
+    atualizado apenas para os arquivos modificados.
+
+    Parâmetros:
+    -----------
+    patients: 'all'|'good'|str|list
+        pacientes selecionados (ver *_getCHBMITFilesPath*).
+    index_path: str (default: 'chbmit_index.json')
+        caminho para o arquivo do índice.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com os caminhos dos arquivos EDF (key) e seus cabeçalhos
+        (value).
+    """
+    logging.info("Criando índice de cabeçalhos EDF.")
+    edf_dict = _getCHBMITFilesPath(patients)
+    edf_paths = [p for plabel in sorted(edf_dict) for p in edf_dict[plabel]]
+    return edfHeader.buildIndex(edf_paths, index_path)
+
+
+def loadCHBMITMetadata(index_path='chbmit_metadata.json'):
+    """Lê o índice de metadados da base CHBMIT (ver *buildCHBMITMetadata*).
+
+    Apenas o arquivo do índice é lido, sem acesso aos arquivos da base.
+
+    Parâmetros:
+    -----------
+    index_path: str (default: 'chbmit_metadata.json')
+        caminho para o arquivo do índice (JSON).
+
+    Retorno:
+    --------
+    dict:
+        índice de metadados. Caso o índice não exista, retorna um índice
+        vazio ({'patients': {}}).
+    """
+    if not os.path.exists(index_path):
+        return {'patients': {}}
 
+    logging.debug("Lendo índice de metadados: {}".format(index_path))
+    with open(index_path) as f:
+        return json.load(f)
 
-def _getCHBMITFilesPath(patients='all'):
+
+def buildCHBMITMetadata(patients='all', index_path='chbmit_metadata.json'):
+    """Cria (ou atualiza) o índice de metadados da base CHBMIT.
+
+    O índice relaciona, em um único arquivo JSON, cada paciente aos seus
+    arquivos EDF e cada arquivo à sua duração, frequência de amostragem,
+    canais e intervalos das crises. Os cabeçalhos EDF são obtidos do índice
+    de cabeçalhos (ver *edfHeader.buildIndex*, 'chbmit_index.json') e os
+    sumários do cache de sumários analisados (ver *parseSummaries*,
+    'chbmit_summaries.json'), ambos salvos na pasta de *index_path*. Por
+    isso, apenas os arquivos novos ou modificados são lidos novamente.
+
+    Parâmetros:
+    -----------
+    patients: 'all'|'good'|str|list
+        pacientes selecionados (ver *_getCHBMITFilesPath*).
+    index_path: str (default: 'chbmit_metadata.json')
+        caminho para o arquivo do índice.
+
+    Retorno:
+    --------
+    dict:
+        índice de metadados, estruturado da seguinte forma:
+        d['patients'][plabel]['summary']: caminho, tamanho e data de
+            modificação do sumário do paciente (ou None).
+        d['patients'][plabel]['annotations']: anotações do sumário, no
+            formato de *summaryFileParser*.
+        d['patients'][plabel]['montages']: listagens de canais do sumário
+            (ver *parseSummaries*).
+        d['patients'][plabel]['files'][fname]: cabeçalho do arquivo EDF
+            (ver *edfHeader.readEDFHeader*), com as chaves adicionais
+            'path', 'seizures' (lista com os intervalos [início, fim] das
+            crises, em segundos) e 'start_time'/'end_time' (horários do
+            sumário). Arquivos com cabeçalho inválido possuem a chave
+            'error'.
+    """
+    logging.info("Criando índice de metadados da base CHBMIT.")
+    index_dir = os.path.dirname(index_path)
+    edf_dict = _getCHBMITFilesPath(patients)
+    patients_labels = sorted(edf_dict.keys())
+    annot_paths = dpm.getAnnotationsPath('chbmit', patients_labels, True)
+
+    edf_paths = [p for plabel in patients_labels for p in edf_dict[plabel]]
+    headers = edfHeader.buildIndex(
+        edf_paths, os.path.join(index_dir, 'chbmit_index.json'))
+    summary_paths = [annot_paths[plabel][0] for plabel in patients_labels
+                     if annot_paths.get(plabel)]
+    summaries = parseSummaries(
+        summary_paths, os.path.join(index_dir, 'chbmit_summaries.json'))
+
+    metadata = loadCHBMITMetadata(index_path)
+    for plabel in patients_labels:
+        summary = None
+        parsed = {'files': {}, 'montages': []}
+        if annot_paths.get(plabel):
+            summary_path = annot_paths[plabel][0]
+            summary = dict(resultCache.fileSignature(summary_path),
+                           path=summary_path)
+            parsed = summaries[summary_path]
+        annotations = parsed['files']
+
+        files = {}
+        for edf_path in edf_dict[plabel]:
+            fname = os.path.basename(edf_path)
+            entry = dict(headers[edf_path], path=edf_path)
+            annot = annotations.get(fname, {'annot_start': [],
+                                            'annot_end': []})
+            entry['seizures'] = [[s, e] for s, e in zip(annot['annot_start'],
+                                                        annot['annot_end'])]
+            entry['start_time'] = annot.get('start_time')
+            entry['end_time'] = annot.get('end_time')
+            files[fname] = entry
+
+        metadata['patients'][plabel] = {'summary': summary,
+                                        'annotations': annotations,
+                                        'montages': parsed['montages'],
+                                        'files': files}
+
+    logging.info("Salvando índice de metadados em: {}".format(index_path))
+    resultCache.saveJSON(index_path, metadata)
+
+    return metadata
+
+
+def _metadataPatients(metadata, patients):
+    """Seleciona os rótulos dos pacientes presentes no índice de metadados.
+
+    Os grupos 'all' e 'good' são lidos do arquivo de configuração, sem
+    acesso aos diretórios da base de dados.
+    """
+    if patients in ('all', 'good'):
+        option = 'all-data' if patients == 'all' else 'good-data'
+        labels = dpm.getCatalog().get('chbmit', option).split(',')
+    elif isinstance(patients, str):
+        labels = [patients]
+    else:
+        labels = list(patients)
+
+    missing = [l for l in labels if l not in metadata['patients']]
+    if missing:
+        logging.warning("Pacientes ausentes no índice de metadados: {}"
+                        "".format(",".join(missing)))
+    return sorted(l for l in labels if l in metadata['patients'])
+
+
+def queryCHBMITMetadata(metadata, patients='all', with_seizures=None):
+    """Consulta os arquivos EDF registrados no índice de metadados.
+
+    Parâmetros:
+    -----------
+    metadata: dict
+        índice de metadados (ver *loadCHBMITMetadata*).
+    patients: 'all'|'good'|str|list
+        pacientes selecionados (ver *_getCHBMITFilesPath*).
+    with_seizures: True|False|None (default: None)
+        se True, retorna apenas os arquivos com crises. Se False, apenas os
+        arquivos sem crises. Se None, todos os arquivos.
+
+    Retorno:
+    --------
+    list de (str, str, dict):
+        lista ordenada com o rótulo do paciente, o nome do arquivo EDF e sua
+        entrada no índice.
+    """
+    ret = []
+    for plabel in _metadataPatients(metadata, patients):
+        files = metadata['patients'][plabel]['files']
+        for fname in sorted(files):
+            entry = files[fname]
+            if (with_seizures is not None and
+                    bool(entry['seizures']) != with_seizures):
+                continue
+            ret.append((plabel, fname, entry))
+    return ret
+
+
+def _getCHBMITFilesPath(patients='all', index_path=None):
     """Retorna um dicionário com os caminhos absolutos dos arquivos EDF.
 
     Extrai todos os caminhos absolutos dos arquivos EDF dos pacientes
@@ -297,6 +763,10 @@ def _getCHBMITFilesPath(patients='all'):
             'good': retornando os pacientes sem arquivos corrompidos
             str: contendo o rótulo do paciente desejado.
             list: contendo os rótulos dos pacientes desejados.
+    index_path: str (default: None)
+        caminho para o índice de metadados (ver *buildCHBMITMetadata*). Caso
+        exista, os caminhos são lidos do índice, sem percorrer os diretórios
+        da base de dados.
 
     Retorno:
     --------
@@ -309,6 +779,14 @@ def _getCHBMITFilesPath(patients='all'):
     Função utilizada para inicializar scripts sobre os arquivos EDF da base de
     dados CHBMIT.
     """
+    if index_path is not None and os.path.exists(index_path):
+        logging.info("Extraindo caminhos do índice: {}".format(index_path))
+        metadata = loadCHBMITMetadata(index_path)
+        edf_dict = {}
+        for plabel, _, entry in queryCHBMITMetadata(metadata, patients):
+            edf_dict.setdefault(str(plabel), []).append(str(entry['path']))
+        return edf_dict
+
     # string com caminho absoluto para base de dados CHB
     dataset_path = dpm.getDatasetPath('chbmit')
 
@@ -335,55 +813,482 @@ def _getCHBMITFilesPath(patients='all'):
     return edf_dict
 
 
-def _configFastExecution(pattern, args):
-    """Verifica se um arquivo deve ser executado, retornando um booleando.
+def _bandTable(nfft, sfreq):
+    """Retorna as frequências e os índices das bandas de *WAVE_BANDS*.
+
+    As frequências da transformada dependem apenas do número de pontos da FFT
+    e da frequência de amostragem. Por isso, a tabela é calculada uma única
+    vez para cada par (nfft, sfreq) e reaproveitada entre arquivos de mesmo
+    tamanho.
+
+    Parâmetros:
+    -----------
+    nfft: int
+        número de pontos da transformada (amostras do sinal ou do segmento).
+    sfreq: float
+        frequência de amostragem do sinal (em Hertz).
+
+    Retorno:
+    --------
+    (np.ndarray, list de (int, int)):
+        frequências da transformada (ver *np.fft.rfftfreq*) e os índices
+        (início, fim) de cada banda de *WAVE_BANDS* (ver *stft.bandSlices*).
+    """
+    key = (nfft, sfreq)
+    if key not in _BAND_TABLES:
+        logging.debug("Calculando tabela de bandas para {}.".format(key))
+        freq = np.fft.rfftfreq(nfft, d=1.0/sfreq)
+        _BAND_TABLES[key] = (freq, stft.bandSlices(freq, WAVE_BANDS))
+    return _BAND_TABLES[key]
+
+
+def _bandPower(pspect, wave_band):
+    """Calcula a potência de cada canal em cada banda de frequência.
+
+    As bandas de ondas cerebrais (delta a gamma) são contíguas, de forma que
+    as somas de todas as bandas são calculadas em uma única redução
+    (*np.add.reduceat*) sobre os espectros.
+
+    Parâmetros:
+    -----------
+    pspect: array_like
+        espectros de potência (linha: canal; coluna: frequência).
+    wave_band: list de (int, int)
+        índices das bandas de *WAVE_BANDS* (ver *_bandTable*).
+
+    Retorno:
+    --------
+    np.ndarray:
+        soma da potência (linha: canal; coluna: banda de *WAVE_BANDS*).
+    """
+    pspect = np.asarray(pspect)
+    starts = np.array([ws for ws, wf in wave_band[1:]])
+    ends = np.array([wf for ws, wf in wave_band[1:]])
+
+    power = np.empty((pspect.shape[0], len(wave_band)))
+    power[:, 0] = pspect.sum(axis=1, dtype=np.float64)
+
+    if np.all(starts[1:] == ends[:-1]) and ends[-1] == pspect.shape[1]:
+        valid = starts < ends
+        power[:, 1:] = 0
+        power[:, 1:][:, valid] = np.add.reduceat(pspect, starts[valid],
+                                                 axis=1, dtype=np.float64)
+    else:
+        for index, (ws, wf) in enumerate(wave_band[1:]):
+            power[:, index+1] = pspect[:, ws:wf].sum(axis=1,
+                                                     dtype=np.float64)
+    return power
+
 
-    Prepara o ambiente para executar um arquivo em modo de execução rápida.
-    Caso todos os arquivos de saída, gerados após a execução de um scritp,
-    existam não há a necessidade de executá-lo novamente. Porém, se algum dos
-    arquivos de saída não existir, todos são excluídos e gerados novamente.
-    Retornando um booleano, indicando se o arquivo de entrada necessita ser
-    executado.
+def _saveBandPower(save_path, power, ch_names, band_patterns):
+    """Salva a potência por banda de cada canal em um arquivo CSV.
 
     Parâmetros:
     -----------
-    pattern: str
-        string contendo o formato padrão dos arquivos de saída, porém, sem
-        formatação. Ex: '{}_FT{}.png'
-    args: list de (arg1, arg2, ...)
-        lista de argumentos para formatação do padrão do arquivo de saída. Cada
-        elemento da lista é uma tupla contendo os argumentos necessários para
-        formatação.
+    save_path: str
+        caminho para o arquivo CSV.
+    power: np.ndarray
+        potência (linha: canal; coluna: banda), ver *_bandPower*.
+    ch_names: list de str
+        rótulos dos canais, na ordem das linhas de *power*.
+    band_patterns: list de str
+        padrões das bandas, na ordem das colunas de *power*.
+    """
+    logging.info("Salvando potência das bandas em: {}".format(save_path))
+    with open(save_path, 'wb') as f:
+        writer = csv.writer(f)
+        writer.writerow(['canal'] + [p if p else 'Total'
+                                     for p in band_patterns])
+        for ch_name, row in zip(ch_names, power):
+            writer.writerow([ch_name] + ['{:.6e}'.format(v) for v in row])
+
+
+def _fourierOutputs(plabel, edf_label, file_pats):
+    """Retorna os caminhos dos arquivos gerados por *applyFourier*.
+
+    Parâmetros:
+    -----------
+    plabel: str
+        rótulo do paciente.
+    edf_label: str
+        nome do arquivo EDF, sem extensão.
+    file_pats: dict
+        padrões dos nomes dos arquivos de saída (ver *applyFourier*).
 
     Retorno:
     --------
-    bool:
-        booleano indicando se o arquivo de entrada precisa, ou não, ser
-        executado.
+    (list de str, str, str):
+        caminhos das imagens, na ordem de *WAVE_BANDS*, do arquivo de
+        potência por banda e do arquivo de espectros.
+    """
+    images = [file_pats['image'].format(plabel, edf_label, pat)
+              for pat in WAVE_PATTERNS]
+    bands = file_pats['bands'].format(plabel, edf_label)
+    spectrum = file_pats['spectrum'].format(plabel, edf_label)
+    return images, bands, spectrum
+
+
+def _stageOutputs(plabel, edf_label, file_pats, stage):
+    """Retorna os caminhos dos arquivos gerados por uma etapa de execução.
+
+    Ver *_fourierOutputs* e o parâmetro *stage* de *applyFourier*.
     """
-    logging.info("Verificando se os arquivos já foram processados.")
-    execute_file = False
-    has_files = []
-    for arg in args:
-        path = pattern.format(*arg)
-        if not os.path.exists(path):
-            execute_file = True
-        else:
-            has_files.append(path)
+    images, bands, spectrum = _fourierOutputs(plabel, edf_label, file_pats)
+    files = []
+    if stage in ('all', 'compute'):
+        files.extend([spectrum, bands])
+    if stage in ('all', 'render'):
+        files.extend(images)
+    return files
+
 
-    if execute_file and has_files:
-        pm.cleanupFiles(has_files)
+def _fourierParams(options, output, band=None):
+    """Retorna os parâmetros que determinam uma saída de *applyFourier*.
 
-    return execute_file
+    Parâmetros:
+    -----------
+    options: dict
+        opções de execução (ver *applyFourier*).
+    output: 'spectrum'|'bands'|'image'
+        tipo da saída: arquivo de espectros, arquivo de potência por banda
+        ou imagem.
+    band: (float, float|None) (default: None)
+        banda de frequência da imagem (apenas para output='image').
 
+    Retorno:
+    --------
+    dict:
+        parâmetros utilizados no cálculo do hash (ver *resultCache*).
+    """
+    params = {'psd_mode': options['psd_mode'],
+              'welch_wsize': options['welch_wsize'],
+              'welch_overlap': options['welch_overlap'],
+              'pad': options['pad']}
+    if output == 'bands':
+        params['bands'] = WAVE_BANDS
+    elif output == 'image':
+        params['band'] = band
+        params['plot'] = FOURIER_PLOT
+        params['title'] = FOURIER_TITLE
+    return params
+
+
+def _computeSpectrum(edf_path, options, raw=None):
+    """Calcula os espectros de potência dos canais de um arquivo EDF.
 
-def applyFourier(patients='all', save_path='.', exec_mode='full'):
+    Parâmetros:
+    -----------
+    edf_path: str
+        caminho absoluto para o arquivo EDF.
+    options: dict
+        opções de execução (ver *applyFourier*).
+    raw: mne.io.Raw (default: None)
+        arquivo EDF já aberto (ver *_prefetchEDF*). Caso None, o arquivo é
+        aberto por *openEDF*.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com os espectros do arquivo, estruturado da seguinte forma:
+        ['pspect']: espectros de potência (um por canal, seguidos do espectro
+            da média dos canais).
+        ['freq']: frequências dos espectros.
+        ['ch_names']: rótulos dos canais (incluindo 'AVG').
+        ['nfft']: número de pontos da transformada (ver *_bandTable*).
+        ['sfreq']: frequência de amostragem do sinal (em Hertz).
+    """
+    if raw is None:
+        logging.info("Abrindo arquivo EDF: {}".format(edf_path))
+        raw = openEDF(edf_path)
+
+    sfreq = raw.info['sfreq']
+    if options['psd_mode'] == 'welch':
+        logging.info("Calculando média dos canais.")
+        avg_ch = np.mean(raw._data, axis=0)
+
+        logging.debug("Criando lista (iterador) com canais e média.")
+        channel_list = itt.chain(raw._data, [avg_ch])
+
+        logging.info("Calculando Espectro de Potência (Welch).")
+        nperseg = options['welch_wsize'] or int(4*sfreq)
+        nperseg = min(nperseg, len(raw))
+        noverlap = int(nperseg*options['welch_overlap'])
+        nfft = nperseg
+        _, pspect = scipy.signal.welch(list(channel_list), fs=sfreq,
+                                       nperseg=nperseg, noverlap=noverlap,
+                                       axis=-1)
+        pspect = pspect.astype(np.float32)
+        del avg_ch
+    else:
+        # espectro dos canais e da média dos canais (última linha), em
+        # float32, com o sinal completado até um tamanho eficiente para FFT
+        logging.info("Calculando Espectro de Potência (Fourier).")
+        pspect, _, nfft = stft.powerSpectrum(raw._data, sfreq,
+                                             pad=options['pad'],
+                                             threads=options['threads'])
+
+    freq, _ = _bandTable(nfft, sfreq)
+    logging.debug("Número de Espectros calculados: {}"
+                  "".format(len(pspect)))
+    logging.debug("Número de Coeficientes nos espectros: {}"
+                  "".format(len(pspect[0])))
+    logging.debug("Número de frequências calculadas (rfftfreq): {}"
+                  "".format(len(freq)))
+
+    # lista de rótulos dos canais
+    ch_names = raw.ch_names
+    ch_names.append("AVG")
+
+    logging.debug("Deletando variáveis.")
+    del raw._data
+    del raw
+    return {'pspect': pspect, 'freq': freq, 'ch_names': ch_names,
+            'nfft': nfft, 'sfreq': sfreq}
+
+
+def _saveSpectrum(save_path, spectrum):
+    """Salva os espectros de potência de um arquivo EDF (formato npz).
+
+    Parâmetros:
+    -----------
+    save_path: str
+        caminho para o arquivo .npz.
+    spectrum: dict
+        espectros do arquivo EDF (ver *_computeSpectrum*).
+    """
+    logging.info("Salvando espectros em: {}".format(save_path))
+    np.savez(save_path, pspect=np.asarray(spectrum['pspect']),
+             freq=spectrum['freq'], ch_names=np.array(spectrum['ch_names']),
+             nfft=spectrum['nfft'], sfreq=spectrum['sfreq'])
+
+
+def _loadSpectrum(load_path):
+    """Lê os espectros de potência salvos por *_saveSpectrum*.
+
+    Retorno:
+    --------
+    dict:
+        espectros do arquivo EDF (ver *_computeSpectrum*).
+    """
+    logging.info("Lendo espectros de: {}".format(load_path))
+    store = np.load(load_path)
+    try:
+        return {'pspect': store['pspect'], 'freq': store['freq'],
+                'ch_names': store['ch_names'].tolist(),
+                'nfft': int(store['nfft']), 'sfreq': float(store['sfreq'])}
+    finally:
+        store.close()
+
+
+def _spectrumStale(plabel, edf_path, file_pats, options, signature):
+    """Verifica se o arquivo de espectros de um EDF será calculado (ou
+    seja, se o EDF será aberto) por *_fourierEDF*, a partir da assinatura
+    do EDF (ver *resultCache.fileSignature*)."""
+    if options['stage'] not in ('all', 'compute'):
+        return False
+    if options['exec_mode'] != 'fast':
+        return True
+
+    edf_label = pm.extractFileLabel(edf_path)
+    spect_path = file_pats['spectrum'].format(plabel, edf_label)
+    manifest_path = file_pats['manifest'].format(plabel, edf_label)
+    spect_hash = resultCache.paramsHash(_fourierParams(options, 'spectrum'))
+    manifest = resultCache.loadManifest(manifest_path)
+    return bool(resultCache.staleOutputs(manifest, signature,
+                                         {spect_path: spect_hash}))
+
+
+def _prefetchEDF(edf_items, file_pats, options, depth):
+    """Percorre os arquivos EDF, abrindo os próximos em segundo plano.
+
+    Uma thread abre e decodifica (ver *openEDF*), na ordem de *edf_items*,
+    os arquivos cujos espectros serão calculados, enquanto o arquivo atual é
+    processado. Os arquivos abertos são mantidos em uma fila limitada a
+    *depth* arquivos, limitando o uso de memória. A assinatura de cada
+    arquivo (ver *resultCache.fileSignature*) também é calculada pela thread
+    e repassada a *_fourierEDF*, evitando uma segunda leitura do arquivo
+    quando o hash do conteúdo é utilizado.
+
+    Parâmetros:
+    -----------
+    edf_items: list de (str, str)
+        rótulos dos pacientes e caminhos dos arquivos EDF, em ordem.
+    file_pats, options: dict
+        ver *applyFourier*.
+    depth: int
+        número máximo de arquivos abertos aguardando na fila.
+
+    Retorno:
+    --------
+    generator de (str, str, mne.io.Raw, dict):
+        rótulo do paciente, caminho do arquivo EDF, o arquivo aberto (ou
+        None, caso não precise ser aberto ou ocorra um erro na abertura) e a
+        assinatura do arquivo (ou None, em caso de erro).
+    """
+    queue = Queue.Queue(maxsize=depth)
+
+    def worker():
+        for plabel, edf_path in edf_items:
+            raw = None
+            signature = None
+            try:
+                signature = resultCache.fileSignature(
+                    edf_path, options['content_hash'])
+                if _spectrumStale(plabel, edf_path, file_pats, options,
+                                  signature):
+                    logging.info("Abrindo arquivo EDF (prefetch): {}"
+                                 "".format(edf_path))
+                    raw = openEDF(edf_path)
+            except Exception:
+                # o arquivo é aberto novamente (e o erro propagado) por
+                # *_fourierEDF*
+                logging.warning("[Erro ao abrir (prefetch)]: {}"
+                                "".format(edf_path))
+                raw = None
+            queue.put((plabel, edf_path, raw, signature))
+
+    thread = threading.Thread(target=worker)
+    thread.daemon = True
+    thread.start()
+
+    for _ in edf_items:
+        yield queue.get()
+
+
+def _fourierEDF(plabel, edf_path, file_pats, options, raw=None,
+                signature=None):
+    """Aplica a Transformada de Fourier em um único arquivo EDF.
+
+    Executa, para um arquivo, as etapas de *applyFourier*. A etapa de cálculo
+    ('compute') lê o EDF, calcula os espectros de potência, salvando-os em um
+    arquivo .npz, e a potência por banda. A etapa de plotagem ('render') gera
+    as imagens a partir do arquivo de espectros salvo, sem abrir o EDF.
+    Definida no nível do módulo para que possa ser executada em outros
+    processos.
+
+    No modo de execução 'fast', apenas as saídas inválidas segundo o
+    manifesto do arquivo (ver *resultCache*) são geradas novamente. O EDF é
+    aberto apenas se o arquivo de espectros for inválido.
+
+    Parâmetros:
+    -----------
+    plabel: str
+        rótulo do paciente.
+    edf_path: str
+        caminho absoluto para o arquivo EDF.
+    file_pats: dict
+        padrões dos nomes dos arquivos de saída (ver *applyFourier*).
+    options: dict
+        opções de execução (ver *applyFourier*).
+    raw: mne.io.Raw (default: None)
+        arquivo EDF já aberto (ver *_prefetchEDF*).
+    signature: dict (default: None)
+        assinatura do arquivo EDF já calculada (ver *_prefetchEDF*). Caso
+        None, é calculada por *resultCache.fileSignature*.
+    """
+    print "Executando {}".format(edf_path)
+
+    # extrai o nome do arquivo sem a extensão .edf
+    edf_label = pm.extractFileLabel(edf_path)
+    logging.debug("Nome do arquivo EDF: {}".format(edf_label))
+
+    images, bands_path, spect_path = _fourierOutputs(plabel, edf_label,
+                                                     file_pats)
+    outputs = {}
+    spect_hash = resultCache.paramsHash(_fourierParams(options, 'spectrum'))
+    if options['stage'] in ('all', 'compute'):
+        outputs[spect_path] = spect_hash
+        params = _fourierParams(options, 'bands')
+        outputs[bands_path] = resultCache.paramsHash(params)
+    if options['stage'] in ('all', 'render'):
+        for img_path, band in zip(images, WAVE_BANDS):
+            params = _fourierParams(options, 'image', band)
+            outputs[img_path] = resultCache.paramsHash(params)
+
+    manifest_path = file_pats['manifest'].format(plabel, edf_label)
+    if signature is None:
+        signature = resultCache.fileSignature(edf_path,
+                                              options['content_hash'])
+
+    # verificando quais saídas precisam ser geradas
+    manifest = resultCache.loadManifest(manifest_path)
+    if options['exec_mode'] == 'fast':
+        logging.info("Verificando se os arquivos já foram processados.")
+        stale = resultCache.staleOutputs(manifest, signature, outputs)
+
+        if not stale:
+            logging.info("Resultados válidos. Ignorando: {}".format(edf_path))
+            return
+    else:
+        stale = sorted(outputs)
+
+    if spect_path in stale:
+        spectrum = _computeSpectrum(edf_path, options, raw)
+        _saveSpectrum(spect_path, spectrum)
+        resultCache.updateManifest(manifest, signature, spect_path,
+                                   spect_hash)
+    else:
+        # a etapa de plotagem depende de um arquivo de espectros válido
+        missing = resultCache.staleOutputs(manifest, signature,
+                                           {spect_path: spect_hash})
+        if missing:
+            logging.warning("Espectros inválidos ou inexistentes para {}. "
+                            "Execute a etapa 'compute'.".format(edf_path))
+            return
+        spectrum = _loadSpectrum(spect_path)
+
+    pspect = spectrum['pspect']
+    ch_names = spectrum['ch_names']
+    freq, wave_band = _bandTable(spectrum['nfft'], spectrum['sfreq'])
+
+    if bands_path in stale:
+        logging.info("Calculando potência das bandas de frequência.")
+        power = _bandPower(pspect, wave_band)
+        _saveBandPower(bands_path, power, ch_names, WAVE_PATTERNS)
+        resultCache.updateManifest(manifest, signature, bands_path,
+                                   outputs[bands_path])
+
+    for (ws, wf), pat, img_save_path in zip(wave_band, WAVE_PATTERNS, images):
+        if img_save_path not in stale:
+            continue
+
+        it = [pspect[i][ws:wf] for i in range(len(pspect))]
+
+        logging.info("Gerando plot: {}".format(img_save_path))
+        plotModels.plotChannels(it, signal_time=freq[ws:wf],
+                                ylabel=ch_names, save_path=img_save_path,
+                                title=FOURIER_TITLE.format(pat, edf_label),
+                                **FOURIER_PLOT)
+
+        logging.debug("Imagem salva em {}".format(img_save_path))
+        resultCache.updateManifest(manifest, signature, img_save_path,
+                                   outputs[img_save_path])
+
+    logging.debug("Salvando manifesto: {}".format(manifest_path))
+    resultCache.saveManifest(manifest_path, manifest)
+
+    logging.debug("Deletando variáveis.")
+    del spectrum
+    del pspect
+    logging.debug("Finalizando execução de {}".format(edf_path))
+
+
+def applyFourier(patients='all', save_path='.', exec_mode='full',
+                 psd_mode='fft', welch_wsize=None, welch_overlap=0.5,
+                 jobs=1, content_hash=False, stage='all', pad=True,
+                 threads=1, index_path=None, prefetch=1):
     """Aplica a Transformada de Fourier na base de dados CHBMIT.
 
     script responsável por executar a transformada de fourier sobre a base de
     dados CHBMIT, aos pacientes selecionados. Criando imagens com os espectros,
     salvando em diretórios específicos.
 
+    A execução é dividida em duas etapas. Na etapa de cálculo ('compute'), os
+    espectros de potência de cada arquivo EDF são salvos em um arquivo
+    '{arquivo}_FT.npz', junto à potência por banda ('{arquivo}_FTbands.csv').
+    Na etapa de plotagem ('render'), as imagens são geradas a partir dos
+    espectros salvos, sem a leitura dos arquivos EDF.
+
     Parâmetros:
     -----------
     patients: 'all'|'good'|str|list
@@ -400,13 +1305,72 @@ def applyFourier(patients='all', save_path='.', exec_mode='full'):
     exec_mode: 'full'|'fast'
         opções de execução do script. Se 'full', os arquivos salvos em
         execuções anteriores serãoa removidos e gerando novos resultados. Se
-        'fast', os resultados obtidos em execuções anteriores não serão
-        calculados novamente.
+        'fast', apenas os resultados inválidos de execuções anteriores serão
+        calculados novamente. Um resultado é inválido caso o arquivo EDF ou os
+        parâmetros de processamento tenham sido alterados (ver
+        *resultCache*).
+    psd_mode: 'fft'|'welch' (default: 'fft')
+        forma de cálculo do espectro de potência. Se 'fft', é utilizada a
+        transformada de Fourier de cada canal completo. Se 'welch', é
+        utilizada a média dos periodogramas de segmentos sobrepostos (método
+        de Welch), gerando um espectro compacto com resolução controlada por
+        *welch_wsize*.
+    welch_wsize: int (default: None)
+        tamanho dos segmentos (em número de amostras) no modo 'welch'. Caso
+        None, são utilizados segmentos de 4 segundos (resolução de 0.25Hz).
+    welch_overlap: float (default: 0.5)
+        fração de sobreposição entre segmentos consecutivos no modo 'welch',
+        no intervalo [0, 1).
+    jobs: int (default: 1)
+        número de processos utilizados. Se maior que 1, cada arquivo EDF é
+        executado em um processo separado (*multiprocessing.Pool*).
+    content_hash: True|False (default: False)
+        se True, o conteúdo dos arquivos EDF (hash) é utilizado para validar
+        os resultados no modo 'fast', além do tamanho e data de modificação.
+    stage: 'all'|'compute'|'render' (default: 'all')
+        etapas executadas. Se 'compute', apenas os espectros e a potência por
+        banda são calculados. Se 'render', apenas as imagens são geradas, a
+        partir dos espectros salvos anteriormente. Se 'all', ambas as etapas
+        são executadas.
+    pad: True|False (default: True)
+        no modo 'fft', completa os sinais com zeros até um tamanho eficiente
+        para a FFT. As frequências e bandas são calculadas para o tamanho
+        completado (ver *stft.powerSpectrum*).
+    threads: int (default: 1)
+        número de threads utilizadas nas transformadas de cada arquivo EDF, no
+        modo 'fft'.
+    index_path: str (default: None)
+        caminho para o índice de metadados da base (ver
+        *buildCHBMITMetadata*). Caso exista, os arquivos EDF são selecionados
+        a partir do índice.
+    prefetch: int (default: 1)
+        número de arquivos EDF abertos antecipadamente, em segundo plano,
+        enquanto o arquivo atual é processado (ver *_prefetchEDF*). Limita o
+        uso de memória a até *prefetch* + 2 arquivos abertos. Se 0, os
+        arquivos são abertos apenas quando processados. Utilizado apenas com
+        jobs=1.
     """
     logging.info("Iniciando execução do script: Fourier.")
 
+    if psd_mode not in ('fft', 'welch'):
+        errormsg = ("Modo de cálculo do espectro inválido (psd_mode): {}"
+                    "".format(psd_mode))
+        logging.error(errormsg)
+        raise ValueError(errormsg)
+
+    if not 0 <= welch_overlap < 1:
+        errormsg = ("Sobreposição inválida (welch_overlap), deve estar em "
+                    "[0, 1): {}".format(welch_overlap))
+        logging.error(errormsg)
+        raise ValueError(errormsg)
+
+    if stage not in ('all', 'compute', 'render'):
+        errormsg = "Etapa de execução inválida (stage): {}".format(stage)
+        logging.error(errormsg)
+        raise ValueError(errormsg)
+
     # extrai os caminhos absolutos dos EDF
-    edf_dict = _getCHBMITFilesPath(patients)
+    edf_dict = _getCHBMITFilesPath(patients, index_path)
 
     # lista ordenada dos rótulos dos pacientes
     patients_labels = edf_dict.keys()
@@ -417,11 +1381,21 @@ def applyFourier(patients='all', save_path='.', exec_mode='full'):
     pm.pathStructureValidation(save_path, patients_labels)
     logging.info("Caminhos validados/criados.")
 
-    # padrões para salvar imagens (sinal completo e por bandas)
-    band_patterns = ['', '1Delta', '2Theta', '3Alpha', '4Beta', '5Gamma']
-
     # padão para o nome dos arquivos (base/paciente/arquivo)
-    save_file_pat = os.path.join(save_path, "{}", "{}_FT{}.png")
+    file_pats = {'image': os.path.join(save_path, "{}", "{}_FT{}.png"),
+                 'bands': os.path.join(save_path, "{}", "{}_FTbands.csv"),
+                 'spectrum': os.path.join(save_path, "{}", "{}_FT.npz"),
+                 'manifest': os.path.join(save_path, "{}", "{}_FT.json")}
+
+    # opções de execução, repassadas para cada arquivo EDF
+    options = {'exec_mode': exec_mode,
+               'psd_mode': psd_mode,
+               'welch_wsize': welch_wsize,
+               'welch_overlap': welch_overlap,
+               'content_hash': content_hash,
+               'stage': stage,
+               'pad': pad,
+               'threads': threads}
 
     # limpando arquivos existentes (caso execução completa)
     if exec_mode == 'full':
@@ -431,129 +1405,503 @@ def applyFourier(patients='all', save_path='.', exec_mode='full'):
             for edf_path in edf_dict[plabel]:
                 # extrai o nome do arquivo sem a extensão .edf
                 edf_label = pm.extractFileLabel(edf_path)
-                f = [save_file_pat.format(plabel, edf_label, p)
-                     for p in band_patterns]
-                files.extend(f)
+                files.extend(_stageOutputs(plabel, edf_label, file_pats,
+                                           stage))
+                if stage == 'all':
+                    files.append(file_pats['manifest'].format(plabel,
+                                                              edf_label))
         pm.cleanupFiles(files)
 
     logging.debug("Percorrendo lista de pacientes.")
-    for plabel in patients_labels:
-        logging.info("Executando dados do paciente {}".format(plabel))
-
-        # percorre todos os arquivos .edf
-        for edf_path in edf_dict[plabel]:
-            print "Executando {}".format(edf_path)
-
-            # extrai o nome do arquivo sem a extensão .edf
-            edf_label = pm.extractFileLabel(edf_path)
-            logging.debug("Nome do arquivo EDF: {}".format(edf_label))
-
-            # verificando se é necessário executar arquivo
-            if exec_mode == 'fast':
-                N = len(band_patterns)  # número de padrões
-                p_arg1 = [plabel]*N     # primeiro argumento do padrão
-                p_arg2 = [edf_label]*N  # segundo argumento do padrão
-                p_arg3 = band_patterns  # terceiro argumento do padrão
-                p_args = [(i, j, k) for i, j, k in zip(p_arg1, p_arg2, p_arg3)]
-                to_exec = _configFastExecution(save_file_pat, p_args)
-
-                if not to_exec:
-                    continue
-
-            logging.info("Abrindo arquivo EDF: {}".format(edf_path))
-            raw = openEDF(edf_path)
-
-            logging.info("Calculando média dos canais.")
-            avg_ch = np.mean(raw._data, axis=0)
-
-            logging.debug("Criando lista (iterador) com canais e média.")
-            channel_list = itt.chain(raw._data, [avg_ch])
-
-            logging.info("Calculando Espectro de Potência (Fourier).")
-            pspect = []
-            for channel in channel_list:
-                ft = np.fft.rfft(channel)
-                pspect.append(abs(ft)**2)
-
-            freq = np.fft.rfftfreq(len(raw), d=1.0/raw.info['sfreq'])
-            logging.debug("Número de Espectros calculados: {}"
-                          "".format(len(pspect)))
-            logging.debug("Número de Coeficientes nos espectros: {}"
-                          "".format(len(pspect[0])))
-            logging.debug("Número de frequências calculadas (rfftfreq): {}"
-                          "".format(len(freq)))
-
-            logging.info("Calculando parâmetros de plotagem.")
-
-            # número de subplots e lista de rótulos para eixos y
-            ylabel_list = raw.ch_names
-            ylabel_list.append("AVG")
-            xlabel = "Frequências (Hz)"
-            title_pat = "Espectro de Potência {}: {}"
-
-            logging.debug("Selecionando Faixas de Frequências.")
-            npland = np.logical_and     # shotcut
-            e = 0.0000001               # error
-            # delta waves [0~4Hz]
-            delta = (np.where(npland(freq >= (0-e), freq <= (0+e)))[0][0],
-                     np.where(npland(freq >= (4-e), freq <= (4+e)))[0][0])
-
-            # theta waves [4~8Hz]
-            theta = (np.where(npland(freq >= (4-e), freq <= (4+e)))[0][0],
-                     np.where(npland(freq >= (8-e), freq <= (8+e)))[0][0])
-
-            # alpha waves [8~14Hz]
-            alpha = (np.where(npland(freq >= (8-e), freq <= (8+e)))[0][0],
-                     np.where(npland(freq >= (14-e), freq <= (14+e)))[0][0])
-
-            # beta waves [14~30Hz]
-            beta = (np.where(npland(freq >= (14-e), freq <= (14+e)))[0][0],
-                    np.where(npland(freq >= (30-e), freq <= (30+e)))[0][0])
-
-            # gamma waves [>30Hz]
-            gamma = (np.where(npland(freq >= (30-e), freq <= (30+e)))[0][0],
-                     len(freq))
-
-            wave_band = [(0, len(freq))]    # all freqs
-            wave_band.append(delta)
-            wave_band.append(theta)
-            wave_band.append(alpha)
-            wave_band.append(beta)
-            wave_band.append(gamma)
-
-            for (ws, wf), pat in zip(wave_band, band_patterns):
-                it = [pspect[i][ws:wf] for i in range(len(pspect))]
-                img_save_path = save_file_pat.format(plabel, edf_label, pat)
-
-                logging.info("Gerando plot: {}".format(img_save_path))
-                plotModels.plotChannels(it, signal_time=freq[ws:wf], dpi=600,
-                                        ylabel=ylabel_list, linewidth=0.2,
-                                        ytickline_visible=True, xlabel=xlabel,
-                                        yticklabel_visible=True, ytick_bins=4,
-                                        save_path=img_save_path, figsize=None,
-                                        title=title_pat.format(pat, edf_label),
-                                        borderwidth=0.2, xtick_size=1.5,
-                                        ytick_size=1)
-
-                logging.debug("Imagem salva em {}".format(img_save_path))
-
-            logging.debug("Deletando variáveis.")
-            del raw._data
+    if jobs > 1:
+        logging.info("Executando arquivos EDF em {} processos.".format(jobs))
+        # cada processo executa apenas um arquivo EDF por vez e é recriado a
+        # cada tarefa, mantendo o uso de memória limitado
+        pool = multiprocessing.Pool(jobs, maxtasksperchild=1)
+        tasks = []
+        for plabel in patients_labels:
+            for edf_path in edf_dict[plabel]:
+                args = (plabel, edf_path, file_pats, options)
+                tasks.append(pool.apply_async(_fourierEDF, args))
+        pool.close()
+
+        # aguarda o término de todos os processos, propagando erros
+        for task in tasks:
+            task.get()
+        pool.join()
+    elif prefetch > 0:
+        logging.info("Abrindo até {} arquivos EDF antecipadamente."
+                     "".format(prefetch))
+        edf_items = [(plabel, edf_path) for plabel in patients_labels
+                     for edf_path in edf_dict[plabel]]
+        for plabel, edf_path, raw, signature in _prefetchEDF(
+                edf_items, file_pats, options, prefetch):
+            _fourierEDF(plabel, edf_path, file_pats, options, raw,
+                        signature)
             del raw
-            del ft
-            del pspect
-            del freq
-            del avg_ch
-            logging.debug("Finalizando execução de {}".format(edf_path))
+    else:
+        for plabel in patients_labels:
+            logging.info("Executando dados do paciente {}".format(plabel))
+
+            # percorre todos os arquivos .edf
+            for edf_path in edf_dict[plabel]:
+                _fourierEDF(plabel, edf_path, file_pats, options)
 
     logging.info("Verificando existência de arquivos criados.")
     for plabel in patients_labels:
         for edf_path in edf_dict[plabel]:
             edf_label = pm.extractFileLabel(edf_path)
-            for pat in band_patterns:
-                img_path = save_file_pat.format(plabel, edf_label, pat)
+            for img_path in _stageOutputs(plabel, edf_label, file_pats,
+                                          stage):
                 if os.path.exists(img_path):
                     logging.info("Arquivo OK: {}".format(img_path))
                 else:
                     logging.warning("PROBLEMAS AO GERAR IMAGEM. ARQUIVO NÃO "
                                     "ENCONTRADO: {}".format(img_path))
+
+
+def _patientAnnotations(patients_labels, metadata=None, cache_path=None):
+    """Extrai as anotações (crises) de todos os arquivos dos pacientes.
+
+    Parâmetros:
+    -----------
+    patients_labels: list de str
+        rótulos dos pacientes.
+    metadata: dict (default: None)
+        índice de metadados (ver *loadCHBMITMetadata*). Caso informado, as
+        anotações são lidas do índice, sem analisar os arquivos de sumário.
+    cache_path: str (default: None)
+        caminho para o cache dos sumários analisados (ver *parseSummaries*).
+
+    Retorno:
+    --------
+    dict:
+        dicionário com os nomes dos arquivos EDF (key) e suas anotações
+        (value), no formato de *summaryFileParser*.
+    """
+    annot_dict = {}
+    if metadata is not None:
+        for plabel in patients_labels:
+            patient = metadata['patients'].get(plabel, {})
+            annot_dict.update(patient.get('annotations', {}))
+        return annot_dict
+
+    annot_paths = dpm.getAnnotationsPath('chbmit', patients_labels, True)
+    summary_paths = [path for plabel in patients_labels
+                     for path in annot_paths.get(plabel, [])]
+    summaries = parseSummaries(summary_paths, cache_path)
+    for summary_path in summary_paths:
+        annot_dict.update(summaries[summary_path]['files'])
+    return annot_dict
+
+
+def _timelineFiles(edf_paths, annot_dict):
+    """Retorna os arquivos EDF no formato de *patientTimeline.PatientTimeline*
+    (nome, caminho e horários de início e término do sumário)."""
+    files = []
+    for edf_path in sorted(edf_paths):
+        fname = os.path.basename(edf_path)
+        annot = annot_dict.get(fname, {})
+        files.append((fname, edf_path, annot.get('start_time'),
+                      annot.get('end_time')))
+    return files
+
+
+def _seizureIndex(edf_dict, annot_dict):
+    """Cria o índice de crises no eixo de tempo global de cada paciente.
+
+    Os arquivos EDF de cada paciente são posicionados no tempo (ver
+    *patientTimeline.PatientTimeline*) e registrados no índice com o seu
+    início (ver *seizureIndex.SeizureIndex.addFile*). As crises são
+    adicionadas com a chave do paciente, em tempos globais.
+
+    Parâmetros:
+    -----------
+    edf_dict: dict
+        caminhos dos arquivos EDF de cada paciente (ver
+        *_getCHBMITFilesPath*).
+    annot_dict: dict
+        anotações no formato de *summaryFileParser* (ver *parseSummaries*,
+        com os horários dos arquivos).
+
+    Retorno:
+    --------
+    seizureIndex.SeizureIndex:
+        índice das crises de cada paciente.
+    """
+    index = seizureIndex.SeizureIndex()
+    for plabel in sorted(edf_dict):
+        timeline = patientTimeline.PatientTimeline(
+            _timelineFiles(edf_dict[plabel], annot_dict))
+        starts = []
+        ends = []
+        for t0, _, fname, _ in timeline.segments:
+            index.addFile(fname, plabel, t0)
+            annot = annot_dict.get(fname, {'annot_start': [],
+                                           'annot_end': []})
+            starts.extend(t0 + s for s in annot['annot_start'])
+            ends.extend(t0 + e for e in annot['annot_end'])
+        index.add(plabel, starts, ends)
+    return index
+
+
+def buildSeizureIndex(patients='all', index_path=None, cache_path=None):
+    """Cria o índice de intervalos das crises dos pacientes selecionados.
+
+    As crises são posicionadas no eixo de tempo global de cada paciente
+    (ver *_seizureIndex*), de forma que as consultas consideram as crises
+    dos arquivos vizinhos.
+
+    Parâmetros:
+    -----------
+    patients: 'all'|'good'|str|list
+        pacientes selecionados (ver *_getCHBMITFilesPath*).
+    index_path: str (default: None)
+        caminho para o índice de metadados (ver *buildCHBMITMetadata*). Caso
+        exista, os arquivos e as anotações são lidos do índice.
+    cache_path: str (default: None)
+        caminho para o cache dos sumários analisados (ver *parseSummaries*).
+
+    Retorno:
+    --------
+    seizureIndex.SeizureIndex:
+        índice com os intervalos das crises de cada paciente (plabel). Cada
+        arquivo EDF (fname) é registrado com o seu início no eixo do
+        paciente (ver *seizureIndex.SeizureIndex.locate*).
+    """
+    edf_dict = _getCHBMITFilesPath(patients, index_path)
+    metadata = None
+    if index_path is not None and os.path.exists(index_path):
+        metadata = loadCHBMITMetadata(index_path)
+
+    annot_dict = _patientAnnotations(sorted(edf_dict), metadata, cache_path)
+    return _seizureIndex(edf_dict, annot_dict)
+
+
+def openPatientTimeline(plabel, index_path=None, cache_path=None,
+                        block_records=60, cache_blocks=8):
+    """Cria o sinal virtual contínuo de um paciente (ver
+    *patientTimeline.PatientTimeline*).
+
+    Os arquivos EDF do paciente são posicionados no tempo pelos horários de
+    início e término registrados no arquivo de sumário.
+
+    Parâmetros:
+    -----------
+    plabel: str
+        rótulo do paciente (e.g., 'chb01').
+    index_path: str (default: None)
+        caminho para o índice de metadados (ver *buildCHBMITMetadata*). Caso
+        exista, os arquivos e horários são lidos do índice.
+    cache_path: str (default: None)
+        caminho para o cache dos sumários analisados (ver *parseSummaries*).
+    block_records, cache_blocks: int
+        ver *patientTimeline.PatientTimeline*.
+
+    Retorno:
+    --------
+    patientTimeline.PatientTimeline:
+        sinal virtual do paciente.
+    """
+    edf_dict = _getCHBMITFilesPath([plabel], index_path)
+    metadata = None
+    if index_path is not None and os.path.exists(index_path):
+        metadata = loadCHBMITMetadata(index_path)
+    annot_dict = _patientAnnotations([plabel], metadata, cache_path)
+
+    files = _timelineFiles(edf_dict.get(plabel, []), annot_dict)
+    return patientTimeline.PatientTimeline(files, block_records, cache_blocks)
+
+
+def windowLabels(windex_list, sfreq, annot_dict, fname, preictal_len=600.0,
+                 postictal_len=600.0, wsize=None):
+    """Retorna a classe de cada janela da STFT em relação às crises.
+
+    As classes são calculadas de forma vetorizada para todas as janelas,
+    por busca binária nos intervalos das crises (ver
+    *seizureIndex.SeizureIndex*). Cada janela recebe uma única classe, com
+    a seguinte prioridade: *ICTAL*, *PREICTAL*, *POSTICTAL* e *INTERICTAL*.
+
+    Com um índice de *buildSeizureIndex*, os tempos das janelas são
+    convertidos para o eixo de tempo global do paciente, considerando as
+    crises dos arquivos vizinhos (e.g., o final de um arquivo anterior a um
+    arquivo que começa com uma crise é pré-ictal). Com um dicionário de
+    anotações, apenas as crises do próprio arquivo são consideradas.
+
+    Parâmetros:
+    -----------
+    windex_list: np.ndarray
+        amostras centrais das janelas (ver *stft.stft*).
+    sfreq: float
+        frequência de amostragem do sinal (em Hertz).
+    annot_dict: dict|seizureIndex.SeizureIndex
+        anotações no formato de *summaryFileParser*, ou um índice de crises
+        já criado (ver *buildSeizureIndex*).
+    fname: str
+        nome do arquivo EDF das janelas.
+    preictal_len: float (default: 600.0)
+        duração do período pré-ictal, anterior ao início das crises (em
+        segundos).
+    postictal_len: float (default: 600.0)
+        duração do período pós-ictal, posterior ao término das crises (em
+        segundos).
+    wsize: int (default: None)
+        tamanho das janelas (em número de amostras). Caso informado, uma
+        janela é ictal se qualquer trecho dela estiver em uma crise. Caso
+        None, apenas o centro da janela é considerado.
+
+    Retorno:
+    --------
+    np.ndarray (int8):
+        classes das janelas (*INTERICTAL*, *PREICTAL*, *ICTAL* ou
+        *POSTICTAL*).
+    """
+    if isinstance(annot_dict, seizureIndex.SeizureIndex):
+        index = annot_dict
+    else:
+        index = seizureIndex.SeizureIndex()
+        if fname in annot_dict:
+            annot = annot_dict[fname]
+            index.add(fname, annot['annot_start'], annot['annot_end'])
+
+    # tempos das janelas no eixo de tempo da chave (paciente ou arquivo)
+    key, offset = index.locate(fname)
+    t = np.asarray(windex_list, dtype=np.float64)/sfreq + offset
+    if wsize is None:
+        ictal = index.distance(key, t) == 0
+    else:
+        half = wsize/(2.0*sfreq)
+        ictal = index.overlaps(key, t-half, t+half)
+
+    labels = np.full(t.shape, INTERICTAL, dtype=np.int8)
+    labels[index.timeSinceLast(key, t) <= postictal_len] = POSTICTAL
+    labels[index.timeToNext(key, t) <= preictal_len] = PREICTAL
+    labels[ictal] = ICTAL
+    return labels
+
+
+def _epochWindows(duration, start_list, end_list, epoch_len, preictal_len,
+                  margin, interictal_rate, overlap, rng, index, fname):
+    """Seleciona os inícios e classes das épocas de um arquivo EDF.
+
+    Parâmetros:
+    -----------
+    duration: float
+        duração do arquivo (em segundos). Épocas que ultrapassam o término
+        do arquivo são descartadas.
+    start_list, end_list: list de float
+        inícios e términos das crises do arquivo (em segundos).
+    epoch_len, preictal_len, margin, interictal_rate, overlap:
+        ver *extractEpochs*.
+    rng: np.random.RandomState
+        gerador de números aleatórios da amostragem inter-ictal.
+    index: seizureIndex.SeizureIndex
+        índice das crises no eixo de tempo do paciente (ver
+        *_seizureIndex*). A distância mínima (*margin*) das épocas
+        inter-ictais é verificada em relação às crises de todos os arquivos
+        do paciente, inclusive os vizinhos.
+    fname: str
+        nome do arquivo EDF.
+
+    Retorno:
+    --------
+    list de (float, int):
+        lista com o início (em segundos) e a classe de cada época.
+    """
+    step = epoch_len*(1-overlap)
+    seizures = zip(start_list, end_list)
+
+    def overlapsSeizure(lb, rb, pad=0):
+        return any(lb < e+pad and rb > s-pad for s, e in seizures)
+
+    windows = []
+    for s, e in seizures:
+        if e > duration:
+            logging.warning("Crise ({}, {}) ultrapassa o término do arquivo "
+                            "({}s): {}".format(s, e, duration, fname))
+
+        # épocas ictais: inteiramente contidas na crise e no arquivo
+        for lb in np.arange(s, min(e, duration)-epoch_len+1e-9, step):
+            windows.append((lb, ICTAL))
+
+        # épocas pré-ictais: anteriores ao início da crise, sem conter crises
+        for lb in np.arange(max(0, s-preictal_len),
+                            min(s, duration)-epoch_len+1e-9, step):
+            if not overlapsSeizure(lb, lb+epoch_len):
+                windows.append((lb, PREICTAL))
+
+    # épocas inter-ictais: distantes (*margin*) de todas as crises do
+    # paciente, no eixo de tempo global
+    key, offset = index.locate(fname)
+    candidates = np.arange(0, duration-epoch_len+1e-9, epoch_len)
+    near = index.overlaps(key, candidates + offset - margin,
+                          candidates + offset + epoch_len + margin)
+    candidates = list(candidates[~near])
+    if candidates and interictal_rate > 0:
+        nsel = int(np.ceil(len(candidates)*interictal_rate))
+        selected = rng.choice(candidates, min(nsel, len(candidates)),
+                              replace=False)
+        windows.extend((lb, INTERICTAL) for lb in sorted(selected))
+
+    return windows
+
+
+def extractEpochs(patients='all', save_path='.', epoch_len=4.0,
+                  preictal_len=600.0, margin=3600.0, interictal_rate=0.05,
+                  overlap=0.0, channels=None, seed=0, index_path=None):
+    """Extrai épocas ictais, pré-ictais e inter-ictais para um arquivo único.
+
+    Com base nas anotações dos arquivos de sumário (ver *summaryFileParser*),
+    recorta épocas de tamanho fixo de todos os arquivos EDF dos pacientes
+    selecionados e as armazena em um vetor contíguo em disco, acessado por
+    mapeamento em memória ('epochs.npy', formato (época, canal, amostra),
+    float32). Um índice ('epochs_index.npy') registra, para cada época, o
+    paciente, o arquivo EDF, o início (em segundos) e a classe (*INTERICTAL*,
+    *PREICTAL* ou *ICTAL*). Com isso, as épocas podem ser acessadas de forma
+    aleatória sem a abertura dos arquivos EDF (ver *openEpochStore*).
+
+    A extração é feita em duas passagens: na primeira, apenas os cabeçalhos
+    dos arquivos são lidos para selecionar as épocas e alocar o vetor; na
+    segunda, cada arquivo EDF é lido uma única vez.
+
+    Parâmetros:
+    -----------
+    patients: 'all'|'good'|str|list
+        pacientes selecionados (ver *_getCHBMITFilesPath*).
+    save_path: str
+        caminho para a pasta em que o vetor e o índice serão salvos.
+    epoch_len: float (default: 4.0)
+        duração das épocas (em segundos).
+    preictal_len: float (default: 600.0)
+        duração do período pré-ictal, anterior ao início das crises (em
+        segundos).
+    margin: float (default: 3600.0)
+        distância mínima (em segundos) entre épocas inter-ictais e crises do
+        paciente, inclusive as de arquivos vizinhos (verificada no eixo de
+        tempo global do paciente, ver *buildSeizureIndex*).
+    interictal_rate: float (default: 0.05)
+        fração das épocas inter-ictais candidatas que são amostradas.
+    overlap: float (default: 0.0)
+        fração de sobreposição entre épocas ictais e pré-ictais consecutivas.
+    channels: list de str (default: None)
+        canais extraídos. Caso None, são utilizados os canais do primeiro
+        arquivo. Arquivos que não contém os canais são ignorados.
+    seed: int (default: 0)
+        semente do gerador de números aleatórios da amostragem inter-ictal.
+    index_path: str (default: None)
+        caminho para o índice de metadados da base (ver
+        *buildCHBMITMetadata*). Caso exista, os arquivos EDF e as anotações
+        são lidos do índice.
+
+    Retorno:
+    --------
+    (str, str):
+        caminhos para o vetor de épocas e para o índice.
+    """
+    logging.info("Iniciando extração de épocas.")
+
+    edf_dict = _getCHBMITFilesPath(patients, index_path)
+    patients_labels = sorted(edf_dict.keys())
+    metadata = None
+    if index_path is not None and os.path.exists(index_path):
+        metadata = loadCHBMITMetadata(index_path)
+    annot_dict = _patientAnnotations(
+        patients_labels, metadata,
+        os.path.join(save_path, 'chbmit_summaries.json'))
+    seizures = _seizureIndex(edf_dict, annot_dict)
+    rng = np.random.RandomState(seed)
+
+    # primeira passagem: seleção das épocas a partir dos cabeçalhos
+    logging.info("Selecionando épocas.")
+    sfreq = None
+    plan = []   # (paciente, caminho do EDF, lista de épocas)
+    for plabel in patients_labels:
+        for edf_path in edf_dict[plabel]:
+            try:
+                raw = mne.io.read_raw_edf(edf_path, preload=False,
+                                          verbose=False)
+            except:
+                logging.warning("[Erro ao abrir]: {}".format(edf_path))
+                continue
+
+            ch_names = [ch for ch in raw.ch_names if ch != 'STI 014']
+            if channels is None:
+                channels = ch_names
+            if sfreq is None:
+                sfreq = raw.info['sfreq']
+
+            has_channels = set(channels) <= set(ch_names)
+            if raw.info['sfreq'] != sfreq or not has_channels:
+                logging.warning("Canais ou frequência de amostragem "
+                                "incompatíveis. Ignorando: {}"
+                                "".format(edf_path))
+                continue
+
+            fname = edf_path.split('/')[-1]
+            annot = annot_dict.get(fname, {'annot_start': [],
+                                           'annot_end': []})
+            windows = _epochWindows(len(raw)/sfreq, annot['annot_start'],
+                                    annot['annot_end'], epoch_len,
+                                    preictal_len, margin, interictal_rate,
+                                    overlap, rng, seizures, fname)
+            if windows:
+                plan.append((plabel, edf_path, windows))
+
+    nepochs = sum(len(windows) for _, _, windows in plan)
+    nsamples = int(round(epoch_len*sfreq)) if sfreq else 0
+    nchannels = len(channels) if channels else 0
+    logging.info("Épocas selecionadas: {}".format(nepochs))
+
+    epochs_path = os.path.join(save_path, 'epochs.npy')
+    epoch_index_path = os.path.join(save_path, 'epochs_index.npy')
+    epochs = np.lib.format.open_memmap(epochs_path, mode='w+',
+                                       dtype=np.float32,
+                                       shape=(nepochs, nchannels, nsamples))
+    index = np.zeros(nepochs, dtype=EPOCH_INDEX_DTYPE)
+
+    # segunda passagem: leitura de cada arquivo EDF e cópia das épocas
+    pos = 0
+    for plabel, edf_path, windows in plan:
+        logging.info("Extraindo {} épocas de: {}"
+                     "".format(len(windows), edf_path))
+        raw = openEDF(edf_path, channels=channels)
+        # *pick_channels* mantém a ordem dos canais do arquivo, que varia
+        # entre arquivos (montagens diferentes)
+        data = raw._data[[raw.ch_names.index(ch) for ch in channels]]
+
+        fname = edf_path.split('/')[-1]
+        for start, label in windows:
+            lb = int(round(start*sfreq))
+            epochs[pos] = data[:, lb:lb+nsamples]
+            index[pos] = (plabel, fname, start, label)
+            pos += 1
+
+        del raw._data
+        del raw
+        del data
+
+    epochs.flush()
+    del epochs
+    np.save(epoch_index_path, index)
+
+    logging.info("Épocas salvas em: {}".format(epochs_path))
+    return epochs_path, epoch_index_path
+
+
+def openEpochStore(save_path='.'):
+    """Abre as épocas salvas por *extractEpochs*, sem carregá-las em memória.
+
+    Parâmetros:
+    -----------
+    save_path: str
+        caminho para a pasta em que as épocas foram salvas.
+
+    Retorno:
+    --------
+    (np.memmap, np.ndarray):
+        vetor de épocas (época, canal, amostra), mapeado em memória, somente
+        leitura, e o índice das épocas (ver *EPOCH_INDEX_DTYPE*).
+    """
+    epochs = np.load(os.path.join(save_path, 'epochs.npy'), mmap_mode='r')
+    index = np.load(os.path.join(save_path, 'epochs_index.npy'))
+    return epochs, index
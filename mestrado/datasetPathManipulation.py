@@ -6,6 +6,126 @@ import logging
 import os
 
 
+class DatasetCatalog(object):
+    """Catálogo das bases de dados, com configuração e listagens em cache.
+
+    Lê o arquivo de configuração (dataset.cfg) uma única vez e memoriza as
+    listagens dos diretórios das bases de dados. A configuração é lida
+    novamente apenas quando o arquivo é modificado e cada listagem é refeita
+    apenas quando a data de modificação (mtime) do diretório é alterada,
+    evitando acessos repetidos ao sistema de arquivos (e.g., em
+    armazenamento de rede).
+
+    Parâmetros:
+    -----------
+    config_path: str (default: 'dataset.cfg')
+        caminho para o arquivo de configuração das bases de dados.
+    """
+
+    def __init__(self, config_path='dataset.cfg'):
+        self.config_path = config_path
+        self.invalidate()
+
+    def invalidate(self):
+        """Descarta a configuração e todas as listagens memorizadas."""
+        self._config = None
+        self._config_mtime = None
+        self._dataset_paths = {}
+        self._listings = {}
+
+    def config(self):
+        """Retorna a configuração (*ConfigParser*), lendo-a se necessário."""
+        mtime = None
+        if os.path.exists(self.config_path):
+            mtime = os.path.getmtime(self.config_path)
+
+        if self._config is None or mtime != self._config_mtime:
+            logging.debug("Lendo configuração: {}".format(self.config_path))
+            config = ConfigParser.ConfigParser()
+            config.read(self.config_path)
+            self._config = config
+            self._config_mtime = mtime
+            self._dataset_paths = {}
+        return self._config
+
+    def get(self, dataset_label, option):
+        """Retorna uma opção de uma base de dados (seção) da configuração."""
+        return self.config().get(dataset_label, option)
+
+    def datasetPath(self, dataset_label):
+        """Retorna o caminho de uma base de dados, ou None se não existir."""
+        self.config()
+        if dataset_label not in self._dataset_paths:
+            path = self.get(dataset_label, 'path')
+            if not os.path.exists(path):
+                return None
+            self._dataset_paths[dataset_label] = path
+        return self._dataset_paths[dataset_label]
+
+    def _listing(self, path):
+        """Retorna a listagem memorizada de um diretório, atualizando-a caso
+        o diretório tenha sido modificado."""
+        mtime = os.stat(path).st_mtime
+        listing = self._listings.get(path)
+        if listing is None or listing['mtime'] != mtime:
+            logging.debug("Listando diretório: {}".format(path))
+            listing = {'mtime': mtime, 'entries': sorted(os.listdir(path)),
+                       'dirs': None}
+            self._listings[path] = listing
+        return listing
+
+    def listdir(self, path):
+        """Retorna os nomes (ordenados) dos arquivos de um diretório."""
+        return list(self._listing(path)['entries'])
+
+    def exists(self, path):
+        """Verifica se um caminho existe, a partir da listagem do diretório
+        pai."""
+        parent, name = os.path.split(os.path.normpath(path))
+        try:
+            return name in self._listing(parent)['entries']
+        except OSError:
+            return False
+
+    def isdir(self, path):
+        """Verifica se um caminho é um diretório, a partir da listagem do
+        diretório pai."""
+        parent, name = os.path.split(os.path.normpath(path))
+        try:
+            listing = self._listing(parent)
+        except OSError:
+            return False
+
+        if listing['dirs'] is None:
+            listing['dirs'] = set(e for e in listing['entries']
+                                  if os.path.isdir(os.path.join(parent, e)))
+        return name in listing['dirs']
+
+
+# catálogo compartilhado pelas funções deste módulo (ver getCatalog)
+_CATALOG = None
+
+
+def getCatalog(config_path='dataset.cfg'):
+    """Retorna o catálogo compartilhado das bases de dados.
+
+    Parâmetros:
+    -----------
+    config_path: str (default: 'dataset.cfg')
+        caminho para o arquivo de configuração. Caso seja diferente do
+        utilizado pelo catálogo atual, um novo catálogo é criado.
+
+    Retorno:
+    --------
+    DatasetCatalog:
+        catálogo das bases de dados.
+    """
+    global _CATALOG
+    if _CATALOG is None or _CATALOG.config_path != config_path:
+        _CATALOG = DatasetCatalog(config_path)
+    return _CATALOG
+
+
 def getDatasetPath(dataset_label):
     """Retorna o caminho para uma base de dados, se este existir.
 
@@ -30,21 +150,21 @@ def getDatasetPath(dataset_label):
         erro lançado caso o caminho para a base de dados não exista.
     """
     logging.debug("Executando getDatasetPath().")
-    config = ConfigParser.ConfigParser()
-    config.read('dataset.cfg')
-    dataset_path = config.get(dataset_label, 'path')
+    catalog = getCatalog()
+    dataset_path = catalog.datasetPath(dataset_label)
 
     logging.debug(("Procurando base de dados {} "
                    "em: {}".format(dataset_label, dataset_path)))
 
-    if os.path.exists(dataset_path):
+    if dataset_path is not None:
         logging.debug("Base de dados encontrada.")
         logging.debug("Retornando caminho para base de dados.")
         return dataset_path
     else:
         msg = ("Caminho não encontrado. "
                "Verificar caminho para a base de dados {} "
-               "no arquivo de configuração!".format(dataset_path))
+               "no arquivo de configuração!"
+               "".format(catalog.get(dataset_label, 'path')))
 
         logging.error(msg)
         raise ValueError(msg)
@@ -85,17 +205,16 @@ def getPatientsLabel(dataset_label, good_data=True):
     dataset_path = getDatasetPath(dataset_label)
 
     # leitura do arquivo de configuração
-    config = ConfigParser.ConfigParser()
-    config.read('dataset.cfg')
+    catalog = getCatalog()
 
     # seleciona os rótulos desejados
     if good_data:
         logging.debug(("Selecionando rótulos dos pacientes  "
                        "sem arquivos corrompidos."))
-        labels = config.get(dataset_label, 'good-data').split(',')
+        labels = catalog.get(dataset_label, 'good-data').split(',')
     else:
         logging.debug("Selecionando rótulos de todos os pacientes.")
-        labels = config.get(dataset_label, 'all-data').split(',')
+        labels = catalog.get(dataset_label, 'all-data').split(',')
 
     labels.sort()
 
@@ -104,16 +223,18 @@ def getPatientsLabel(dataset_label, good_data=True):
         logging.debug(label)
 
     logging.debug("Verificando existência dos rótulos.")
+    valid_labels = []
     for label in labels:
         path = os.path.join(dataset_path, label)
         logging.debug("Verificando {}".format(path))
 
-        if not(os.path.exists(path) and os.path.isdir(path)):
+        if not catalog.isdir(path):
             logging.error("Não foi possível encontrar: {}".format(path))
             logging.error("Removendo '{}' da lista de retorno.".format(label))
-            labels.remove(label)
+            continue
+        valid_labels.append(label)
 
-    return labels
+    return valid_labels
 
 
 def getPatientsPath(dataset_label, patients, abs_path=True):
@@ -176,10 +297,11 @@ def getPatientsPath(dataset_label, patients, abs_path=True):
         raise ValueError(errormsg)
 
     ret = []
+    catalog = getCatalog()
     dataset_path = getDatasetPath(dataset_label)
     for patient in patients_labels:
         path = os.path.join(dataset_path, patient)
-        if not os.path.exists(path):
+        if not catalog.exists(path):
             logging.warning("O caminho não existe: {}".format(path))
             logging.warning(("Removendo paciente da lista de retorno: "
                              "{}.".format(patient)))
@@ -237,9 +359,8 @@ def getFilesPath(dataset_label, patients, abs_path=True):
     # verifica existência e retorna o caminho para a base de dados
     dataset_path = getDatasetPath(dataset_label)
 
-    config = ConfigParser.ConfigParser()
-    config.read('dataset.cfg')
-    file_type = config.get(dataset_label, 'file-type')
+    catalog = getCatalog()
+    file_type = catalog.get(dataset_label, 'file-type')
     ext = ".{}".format(file_type)   # data file extension
 
     logging.debug(("Construindo lista com rótulos dos "
@@ -253,8 +374,7 @@ def getFilesPath(dataset_label, patients, abs_path=True):
         logging.debug("Verificando arquivos em: {}".format(path))
 
         logging.debug("Extraindo apenas os nomes dos arquivos de dados.")
-        patient_files = [f for f in os.listdir(path) if f.endswith(ext)]
-        patient_files.sort()
+        patient_files = [f for f in catalog.listdir(path) if f.endswith(ext)]
 
         if abs_path:
             logging.debug("Construção com caminho completo.")
@@ -314,9 +434,8 @@ def getAnnotationsPath(dataset_label, patients, abs_path=True):
     # extração e validação dos rótulos dos pacientes
     patients_labels = getPatientsPath(dataset_label, patients, False)
 
-    config = ConfigParser.ConfigParser()
-    config.read('dataset.cfg')
-    ext = config.get(dataset_label, 'annot-type')
+    catalog = getCatalog()
+    ext = catalog.get(dataset_label, 'annot-type')
 
     annot_names = {}
     logging.debug("Criando dicionário com caminhos dos arquivos de anotações.")
@@ -325,7 +444,8 @@ def getAnnotationsPath(dataset_label, patients, abs_path=True):
         logging.debug("Procurando anotações em: {}".format(path))
 
         logging.debug("Extraindo apenas o nome do arquivo de sumário.")
-        annot_names[patient] = [f for f in os.listdir(path) if f.endswith(ext)]
+        annot_names[patient] = [f for f in catalog.listdir(path)
+                                if f.endswith(ext)]
 
         if abs_path:
             logging.debug("Inserindo caminho completo para sumário.")
@@ -350,7 +470,7 @@ def getAnnotationsPath(dataset_label, patients, abs_path=True):
             else:
                 path = os.path.join(dataset_path, patient, annot)
 
-            if not os.path.exists(path):
+            if not catalog.exists(path):
                 logging.warning(("Não foi possivel encontrar o caminho: "
                                  "{}".format(path)))
                 logging.warning("Removendo arquivo não encontrado.")
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import numpy as np
+import os
+import resultCache
+
+
+# campos do cabeçalho fixo de um arquivo EDF: (nome, tamanho em bytes)
+_FIXED_FIELDS = [('version', 8), ('patient', 80), ('recording', 80),
+                 ('startdate', 8), ('starttime', 8), ('header_bytes', 8),
+                 ('reserved', 44), ('n_records', 8), ('record_duration', 8),
+                 ('n_signals', 4)]
+
+# campos do cabeçalho de cada sinal: (nome, tamanho em bytes)
+_SIGNAL_FIELDS = [('labels', 16), ('transducer', 80), ('physical_dim', 8),
+                  ('physical_min', 8), ('physical_max', 8),
+                  ('digital_min', 8), ('digital_max', 8), ('prefilter', 80),
+                  ('samples_per_record', 8), ('reserved', 32)]
+
+
+def _readField(f, size):
+    """Lê um campo ASCII de *size* bytes do cabeçalho, sem espaços."""
+    return f.read(size).decode('ascii', 'replace').strip()
+
+
+def readEDFHeader(edf_path):
+    """Lê apenas o cabeçalho de um arquivo EDF, retornando um dicionário.
+
+    Nenhum dado do sinal é decodificado: apenas o cabeçalho fixo (256 bytes)
+    e o cabeçalho dos sinais (256 bytes por sinal) são lidos.
+
+    Parâmetros:
+    -----------
+    edf_path: str
+        caminho para o arquivo EDF.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com as informações do cabeçalho:
+        ['labels']: lista com os rótulos dos canais.
+        ['duplicated']: lista com os rótulos repetidos (e.g., T8-P8).
+        ['sfreq']: frequência de amostragem do primeiro canal (em Hertz).
+        ['n_records']: número de registros de dados (data records).
+        ['record_duration']: duração de cada registro (em segundos).
+        ['duration']: duração do sinal (em segundos).
+        ['samples_per_record']: lista com o número de amostras de cada canal
+            por registro.
+        ['physical_min'], ['physical_max'], ['digital_min'],
+            ['digital_max'], ['physical_dim']: listas com a escala e a
+            unidade de cada canal (ver *readEDFRecords*).
+        ['data_offset']: posição (em bytes) do início dos dados.
+        ['startdate'], ['starttime']: data e hora de início da gravação.
+        ['expected_size']: tamanho esperado do arquivo (em bytes).
+        ['size']: tamanho real do arquivo (em bytes).
+        ['mtime']: data de modificação do arquivo.
+
+    Exceptions:
+    -----------
+    ValueError:
+        erro lançado caso o cabeçalho esteja incompleto ou inválido.
+    """
+    with open(edf_path, 'rb') as f:
+        fixed = {}
+        for name, size in _FIXED_FIELDS:
+            fixed[name] = _readField(f, size)
+
+        try:
+            nsignals = int(fixed['n_signals'])
+            signals = {}
+            for name, size in _SIGNAL_FIELDS:
+                signals[name] = [_readField(f, size) for _ in range(nsignals)]
+
+            n_records = int(fixed['n_records'])
+            record_duration = float(fixed['record_duration'])
+            data_offset = int(fixed['header_bytes'])
+            spr = [int(v) for v in signals['samples_per_record']]
+            scaling = {}
+            for name in ('physical_min', 'physical_max', 'digital_min',
+                         'digital_max'):
+                scaling[name] = [float(v) for v in signals[name]]
+        except ValueError:
+            errormsg = "Cabeçalho EDF inválido: {}".format(edf_path)
+            logging.error(errormsg)
+            raise ValueError(errormsg)
+
+    labels = signals['labels']
+    duplicated = sorted(set(l for l in labels if labels.count(l) > 1))
+
+    header = {'labels': labels,
+              'duplicated': duplicated,
+              'sfreq': spr[0]/record_duration if spr else None,
+              'n_records': n_records,
+              'record_duration': record_duration,
+              'duration': n_records*record_duration,
+              'samples_per_record': spr,
+              'physical_dim': signals['physical_dim'],
+              'data_offset': data_offset,
+              'startdate': fixed['startdate'],
+              'starttime': fixed['starttime'],
+              'expected_size': data_offset + n_records*sum(spr)*2}
+    header.update(scaling)
+    header.update(resultCache.fileSignature(edf_path))
+    return header
+
+
+# fatores de conversão das unidades físicas para Volts (como em *mne*)
+_UNIT_SCALES = {'uv': 1e-6, 'mv': 1e-3, 'v': 1.0}
+
+
+def readEDFRecords(edf_path, header, first, count):
+    """Lê e decodifica um trecho de registros (data records) de um arquivo
+    EDF, sem ler o restante do sinal.
+
+    Parâmetros:
+    -----------
+    edf_path: str
+        caminho para o arquivo EDF.
+    header: dict
+        cabeçalho do arquivo (ver *readEDFHeader*).
+    first: int
+        índice do primeiro registro lido.
+    count: int
+        número de registros lidos. Registros ausentes no final do arquivo
+        (e.g., arquivo truncado) são ignorados.
+
+    Retorno:
+    --------
+    np.ndarray:
+        sinais no formato (canal, amostra), em Volts (ou na unidade física
+        do canal, caso desconhecida).
+
+    Exceptions:
+    -----------
+    ValueError:
+        erro lançado caso os canais possuam números de amostras por registro
+        diferentes.
+    """
+    spr = header['samples_per_record']
+    if len(set(spr)) != 1:
+        errormsg = ("Canais com frequências de amostragem diferentes não "
+                    "são suportados: {}".format(edf_path))
+        logging.error(errormsg)
+        raise ValueError(errormsg)
+
+    nsignals, nspr = len(spr), spr[0]
+    record_size = nsignals*nspr
+    with open(edf_path, 'rb') as f:
+        f.seek(header['data_offset'] + first*record_size*2)
+        data = np.fromfile(f, dtype='<i2', count=count*record_size)
+
+    nrecords = len(data)//record_size
+    data = data[:nrecords*record_size].reshape(nrecords, nsignals, nspr)
+    data = data.transpose(1, 0, 2).reshape(nsignals, nrecords*nspr)
+
+    # conversão dos valores digitais para a unidade física
+    pmin = np.array(header['physical_min'])
+    pmax = np.array(header['physical_max'])
+    dmin = np.array(header['digital_min'])
+    dmax = np.array(header['digital_max'])
+    units = [_UNIT_SCALES.get(dim.lower(), 1.0)
+             for dim in header['physical_dim']]
+    gain = (pmax - pmin)/(dmax - dmin)*np.array(units)
+    offset = pmin*np.array(units) - dmin*gain
+    return data*gain[:, None] + offset[:, None]
+
+
+def loadIndex(index_path):
+    """Lê um índice de cabeçalhos salvo por *buildIndex*.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com os caminhos dos arquivos EDF (key) e seus cabeçalhos
+        (value), ver *readEDFHeader*. Caso o índice não exista, retorna um
+        dicionário vazio.
+    """
+    if not os.path.exists(index_path):
+        return {}
+
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def buildIndex(edf_paths, index_path):
+    """Cria (ou atualiza) um índice com os cabeçalhos de arquivos EDF.
+
+    Os cabeçalhos de todos os arquivos são salvos em um único arquivo JSON.
+    Caso o índice já exista, apenas os arquivos novos ou modificados
+    (tamanho ou data de modificação) são lidos novamente, e os arquivos que
+    não existem mais são removidos.
+
+    Parâmetros:
+    -----------
+    edf_paths: list de str
+        caminhos para os arquivos EDF.
+    index_path: str
+        caminho para o arquivo do índice (JSON).
+
+    Retorno:
+    --------
+    dict:
+        índice atualizado (ver *loadIndex*).
+    """
+    old_index = loadIndex(index_path)
+    index = {}
+    for edf_path in edf_paths:
+        signature = resultCache.fileSignature(edf_path)
+        entry = old_index.get(edf_path)
+        if (entry is not None and
+                entry.get('size') == signature['size'] and
+                entry.get('mtime') == signature['mtime']):
+            index[edf_path] = entry
+            continue
+
+        logging.debug("Lendo cabeçalho: {}".format(edf_path))
+        try:
+            index[edf_path] = readEDFHeader(edf_path)
+        except (ValueError, IOError):
+            logging.warning("[Erro ao ler cabeçalho]: {}".format(edf_path))
+            index[edf_path] = dict(signature, error=True)
+
+    logging.info("Salvando índice de cabeçalhos em: {}".format(index_path))
+    resultCache.saveJSON(index_path, index)
+
+    return index
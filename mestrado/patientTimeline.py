@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import collections
+import edfHeader
+import logging
+import numpy as np
+
+
+def clockSeconds(clock):
+    """Converte um horário 'hh:mm:ss' em segundos (horas maiores que 23,
+    presentes em alguns sumários, são aceitas)."""
+    hours, minutes, seconds = [int(v) for v in clock.split(':')]
+    return hours*3600 + minutes*60 + seconds
+
+
+class PatientTimeline(object):
+    """Sinal virtual contínuo de um paciente, formado por arquivos EDF
+    consecutivos.
+
+    Os arquivos são posicionados em um eixo de tempo global (em segundos, a
+    partir do início do primeiro arquivo) pelos horários de início e término
+    dos arquivos de sumário. Os intervalos entre arquivos são marcados como
+    lacunas (ver *gaps*) e preenchidos com np.nan pelas leituras.
+
+    A leitura é preguiçosa (lazy): os cabeçalhos são lidos apenas no primeiro
+    acesso a cada arquivo e apenas os blocos de registros (data records)
+    necessários para o trecho pedido são lidos e decodificados (ver
+    *edfHeader.readEDFRecords*). Os últimos blocos decodificados são mantidos
+    em uma cache LRU.
+
+    Parâmetros:
+    -----------
+    files: list de (str, str, str, str)
+        arquivos do paciente, em ordem cronológica, na forma (nome do
+        arquivo, caminho, horário de início, horário de término). Horários
+        ausentes (None) são estimados a partir do arquivo anterior e da
+        duração do cabeçalho EDF.
+    block_records: int (default: 60)
+        número de registros por bloco decodificado (nos arquivos CHBMIT, um
+        registro corresponde a 1 segundo).
+    cache_blocks: int (default: 8)
+        número máximo de blocos decodificados mantidos em memória.
+    """
+
+    def __init__(self, files, block_records=60, cache_blocks=8):
+        self.block_records = block_records
+        self.cache_blocks = cache_blocks
+        self._headers = {}
+        self._blocks = collections.OrderedDict()
+
+        # posiciona os arquivos no eixo de tempo global. Horários que voltam
+        # mais de 12 horas no tempo indicam a passagem da meia-noite.
+        self.segments = []
+        origin = None
+        offset = 0
+        end = 0.0
+        for fname, path, start_time, end_time in files:
+            if start_time is None or end_time is None:
+                t0 = end
+                t1 = t0 + self._header(path)['duration']
+            else:
+                t0 = clockSeconds(start_time) + offset
+                if origin is None:
+                    # o primeiro arquivo com horários é posicionado após os
+                    # arquivos já posicionados (sem horários)
+                    origin = t0 - end
+                while t0 - origin < end - 43200:
+                    offset += 86400
+                    t0 += 86400
+                t0 -= origin
+                t1 = clockSeconds(end_time) + offset - origin
+                while t1 < t0:
+                    t1 += 86400
+
+            self.segments.append((t0, t1, fname, path))
+            end = t1
+
+        self.duration = end
+        logging.debug("Linha do tempo: {} arquivos, {} segundos"
+                      "".format(len(self.segments), self.duration))
+
+    def _header(self, path):
+        """Retorna o cabeçalho de um arquivo EDF, lendo-o no primeiro
+        acesso."""
+        if path not in self._headers:
+            self._headers[path] = edfHeader.readEDFHeader(path)
+        return self._headers[path]
+
+    def _block(self, path, block):
+        """Retorna um bloco decodificado de um arquivo EDF (cache LRU)."""
+        key = (path, block)
+        if key in self._blocks:
+            data = self._blocks.pop(key)
+        else:
+            logging.debug("Decodificando bloco {} de: {}".format(block, path))
+            data = edfHeader.readEDFRecords(path, self._header(path),
+                                            block*self.block_records,
+                                            self.block_records)
+            while len(self._blocks) >= self.cache_blocks:
+                self._blocks.popitem(last=False)
+        self._blocks[key] = data
+        return data
+
+    def gaps(self):
+        """Retorna os intervalos (início, término), em segundos, sem sinal
+        entre arquivos consecutivos."""
+        gaps = []
+        end = 0.0
+        for t0, t1, _, _ in self.segments:
+            if t0 > end:
+                gaps.append((end, t0))
+            end = max(end, t1)
+        return gaps
+
+    def locate(self, t):
+        """Retorna o arquivo (nome) e o tempo local (em segundos) de um
+        instante do eixo global, ou (None, None) caso esteja em uma
+        lacuna."""
+        for t0, t1, fname, _ in self.segments:
+            if t0 <= t < t1:
+                return fname, t - t0
+        return None, None
+
+    def get(self, tmin, tmax, channels=None):
+        """Lê um trecho do sinal virtual, em Volts.
+
+        Parâmetros:
+        -----------
+        tmin, tmax: float
+            início e término do trecho no eixo global (em segundos).
+        channels: list de str (default: None)
+            canais lidos. Caso None, são utilizados os canais do primeiro
+            arquivo do trecho. Canais ausentes em um arquivo são preenchidos
+            com np.nan.
+
+        Retorno:
+        --------
+        (np.ndarray, float):
+            sinais no formato (canal, amostra), com np.nan nas lacunas, e a
+            frequência de amostragem (em Hertz).
+        """
+        overlapping = [seg for seg in self.segments
+                       if seg[0] < tmax and seg[1] > tmin]
+        if not overlapping:
+            errormsg = ("Trecho fora da linha do tempo: [{}, {})"
+                        "".format(tmin, tmax))
+            logging.error(errormsg)
+            raise ValueError(errormsg)
+
+        first = self._header(overlapping[0][3])
+        sfreq = first['sfreq']
+        if channels is None:
+            channels = first['labels']
+
+        nsamples = int(round((tmax - tmin)*sfreq))
+        out = np.full((len(channels), nsamples), np.nan)
+        for t0, t1, fname, path in overlapping:
+            header = self._header(path)
+            if header['sfreq'] != sfreq:
+                logging.warning("Frequência de amostragem incompatível. "
+                                "Ignorando: {}".format(path))
+                continue
+
+            # trecho local do arquivo e sua posição na saída
+            spr = header['samples_per_record'][0]
+            block_size = spr*self.block_records
+            lb = int(round((max(tmin, t0) - t0)*sfreq))
+            ub = int(round((min(tmax, t1) - t0)*sfreq))
+            ub = min(ub, header['n_records']*spr)
+            pos = int(round((max(tmin, t0) - tmin)*sfreq))
+
+            rows = [(i, header['labels'].index(ch))
+                    for i, ch in enumerate(channels)
+                    if ch in header['labels']]
+            out_rows = [i for i, _ in rows]
+            in_rows = [j for _, j in rows]
+
+            for block in range(lb//block_size, (ub - 1)//block_size + 1):
+                data = self._block(path, block)
+                b0 = block*block_size
+                s0 = max(lb, b0)
+                s1 = min(ub, b0 + data.shape[1], lb + nsamples - pos)
+                if s1 <= s0:
+                    continue
+                dst = slice(pos + s0 - lb, pos + s1 - lb)
+                out[out_rows, dst] = data[in_rows, s0 - b0:s1 - b0]
+
+        return out, sfreq
@@ -4,6 +4,7 @@
 import collections
 import logging
 import matplotlib.pyplot as plt
+import numpy as np
 
 
 def defaultPlotStruct(subplot_size, title=None, figsize=None,
@@ -152,8 +153,56 @@ def defaultPlotStruct(subplot_size, title=None, figsize=None,
     return fig, axes
 
 
+def envelopeDecimation(x, y, ncols):
+    """Reduz uma série ao envelope de mínimos e máximos por coluna de pixels.
+
+    Divide o eixo x, entre o primeiro e o último valor, em *ncols* intervalos
+    de mesma largura (as colunas de pixels do gráfico) e mantém, para cada
+    intervalo, apenas os pontos de mínimo e de máximo, na ordem em que
+    ocorrem. O primeiro e o último ponto da série são sempre mantidos,
+    preservando os limites do eixo x. Ao plotar a série reduzida em uma área
+    com *ncols* colunas de pixels, o resultado visual é o mesmo da série
+    completa.
+
+    Parâmetros:
+    -----------
+    x: array_like
+        valores da coordenada x, em ordem crescente.
+    y: array_like
+        valores da série.
+    ncols: int
+        número de colunas (intervalos) do envelope.
+
+    Retorno:
+    --------
+    (np.ndarray, np.ndarray):
+        coordenadas x e y da série reduzida. Caso a série possua até
+        2*ncols pontos, é retornada sem alterações.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = len(y)
+    if ncols < 1 or n <= 2*ncols:
+        return x, y
+
+    # coluna de pixels de cada ponto, pelos limites das colunas em x
+    edges = np.linspace(x[0], x[-1], ncols+1)
+    cols = np.searchsorted(edges[1:-1], x, side='right')
+
+    # ordena os pontos por coluna e valor: o primeiro e o último ponto de
+    # cada coluna são o mínimo e o máximo
+    order = np.lexsort((y, cols))
+    starts = np.nonzero(np.concatenate(([True], cols[1:] != cols[:-1])))[0]
+    ends = np.concatenate((starts[1:], [n])) - 1
+
+    # mantém a ordem original dos pontos
+    index = np.unique(np.concatenate(([0, n-1], order[starts],
+                                      order[ends])))
+    return x[index], y[index]
+
+
 def plotChannels(signals, signals_len=None, signal_time=None, save_path=None,
-                 dpi=150, linewidth=1, **kwargs):
+                 dpi=150, linewidth=1, decimate=False, **kwargs):
     """Faz a plotagem de séries temporais em subplotes separados.
 
     Função responsável pela plotagem de séries temporais de uma dimensão, como:
@@ -182,6 +231,11 @@ def plotChannels(signals, signals_len=None, signal_time=None, save_path=None,
         resolução da imagem em dpi (pontos por polegada).
     linewidth: float (default: 1)
         largura da linha plotada (em pontos)
+    decimate: True|False (default: False)
+        se True, cada série é reduzida ao envelope de mínimos e máximos por
+        coluna de pixels do eixo, calculadas a partir da largura da imagem e
+        de *dpi* (ver *envelopeDecimation*). Reduz o tempo de plotagem e o
+        uso de memória de séries longas, mantendo o resultado visual.
     **kwargs:
         as palavras chave restantes são propriedades da função
         *defaultPlotStruct*. Ver *defaultPlotStruct* para mais detalhes.
@@ -203,7 +257,14 @@ def plotChannels(signals, signals_len=None, signal_time=None, save_path=None,
 
     for index, (s, ax) in enumerate(zip(signals, axes)):
         logging.debug("Plotando sobre eixo {}.".format(index))
-        ax.plot(signal_time, s, linewidth=linewidth)
+        x = signal_time
+        if decimate:
+            # número de colunas de pixels ocupadas pelo eixo na imagem salva
+            width = fig.get_size_inches()[0]*ax.get_position().width
+            ncols = int(np.ceil(width*dpi))
+            logging.debug("Reduzindo série para {} colunas.".format(ncols))
+            x, s = envelopeDecimation(signal_time, s, ncols)
+        ax.plot(x, s, linewidth=linewidth)
 
     if save_path is None:
         logging.debug("Exibindo imagem na tela.")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import logging
+import os
+
+
+def fileSignature(path, content_hash=False):
+    """Retorna a assinatura de um arquivo de entrada, em um dicionário.
+
+    A assinatura identifica uma versão do arquivo pelo seu tamanho e data de
+    modificação e, opcionalmente, pelo hash (sha1) do seu conteúdo. Qualquer
+    alteração na assinatura invalida os resultados gerados a partir do
+    arquivo.
+
+    Parâmetros:
+    -----------
+    path: str
+        caminho para o arquivo.
+    content_hash: True|False (default: False)
+        se True, inclui o hash do conteúdo do arquivo na assinatura. Mais
+        seguro, porém exige a leitura completa do arquivo.
+
+    Retorno:
+    --------
+    dict:
+        dicionário com as chaves 'size', 'mtime' e, se calculado, 'sha1'.
+    """
+    st = os.stat(path)
+    signature = {'size': st.st_size, 'mtime': st.st_mtime}
+
+    if content_hash:
+        logging.debug("Calculando hash do conteúdo de: {}".format(path))
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(block)
+        signature['sha1'] = sha1.hexdigest()
+
+    return signature
+
+
+def paramsHash(params):
+    """Retorna o hash (sha1) de um conjunto de parâmetros de processamento.
+
+    Parâmetros:
+    -----------
+    params: dict
+        parâmetros utilizados para gerar uma saída. Deve ser serializável em
+        JSON.
+
+    Retorno:
+    --------
+    str:
+        hash hexadecimal dos parâmetros.
+    """
+    data = json.dumps(params, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def loadManifest(path):
+    """Lê um manifesto de resultados, retornando um dicionário.
+
+    O manifesto registra a assinatura do arquivo de entrada ('source') e, para
+    cada arquivo de saída ('outputs'), o hash dos parâmetros utilizados para
+    gerá-lo. Caso o manifesto não exista ou não possa ser lido, um manifesto
+    vazio é retornado.
+
+    Parâmetros:
+    -----------
+    path: str
+        caminho para o arquivo do manifesto (JSON).
+
+    Retorno:
+    --------
+    dict:
+        manifesto com as chaves 'source' e 'outputs'.
+    """
+    manifest = {'source': None, 'outputs': {}}
+    if not os.path.exists(path):
+        return manifest
+
+    try:
+        with open(path) as f:
+            manifest.update(json.load(f))
+    except ValueError:
+        logging.warning("Manifesto inválido, ignorando: {}".format(path))
+        manifest = {'source': None, 'outputs': {}}
+    return manifest
+
+
+def saveJSON(path, data, indent=None):
+    """Salva um dicionário em um arquivo JSON.
+
+    O arquivo é escrito em um arquivo temporário e renomeado, de forma que um
+    arquivo parcialmente escrito nunca é lido.
+
+    Parâmetros:
+    -----------
+    path: str
+        caminho para o arquivo JSON.
+    data: dict
+        dados a serem salvos.
+    indent: int (default: None)
+        indentação do arquivo (ver *json.dump*). Caso None, o arquivo é
+        escrito de forma compacta.
+    """
+    tmp_path = "{}.tmp".format(path)
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent, sort_keys=True)
+    os.rename(tmp_path, path)
+
+
+def saveManifest(path, manifest):
+    """Salva um manifesto de resultados (ver *loadManifest* e *saveJSON*).
+
+    Parâmetros:
+    -----------
+    path: str
+        caminho para o arquivo do manifesto (JSON).
+    manifest: dict
+        manifesto a ser salvo.
+    """
+    saveJSON(path, manifest, indent=2)
+
+
+def staleOutputs(manifest, signature, outputs):
+    """Retorna os arquivos de saída que precisam ser gerados novamente.
+
+    Uma saída é válida apenas se o arquivo existe, se a assinatura do arquivo
+    de entrada não foi alterada e se o hash dos parâmetros registrado no
+    manifesto é igual ao atual.
+
+    Parâmetros:
+    -----------
+    manifest: dict
+        manifesto de resultados (ver *loadManifest*).
+    signature: dict
+        assinatura atual do arquivo de entrada (ver *fileSignature*).
+    outputs: dict
+        dicionário com os caminhos dos arquivos de saída (key) e o hash dos
+        parâmetros atuais (value), ver *paramsHash*.
+
+    Retorno:
+    --------
+    list de str:
+        caminhos das saídas inválidas, em ordem alfabética.
+    """
+    if manifest['source'] != signature:
+        logging.debug("Arquivo de entrada modificado. Saídas inválidas.")
+        return sorted(outputs)
+
+    stale = []
+    for path, phash in outputs.items():
+        key = os.path.basename(path)
+        if not os.path.exists(path) or manifest['outputs'].get(key) != phash:
+            logging.debug("Saída inválida: {}".format(path))
+            stale.append(path)
+    return sorted(stale)
+
+
+def updateManifest(manifest, signature, path, phash):
+    """Registra uma saída gerada no manifesto.
+
+    Caso a assinatura do arquivo de entrada seja diferente da registrada, as
+    saídas registradas anteriormente são descartadas.
+
+    Parâmetros:
+    -----------
+    manifest: dict
+        manifesto de resultados (ver *loadManifest*).
+    signature: dict
+        assinatura do arquivo de entrada (ver *fileSignature*).
+    path: str
+        caminho do arquivo de saída gerado.
+    phash: str
+        hash dos parâmetros utilizados para gerar a saída.
+    """
+    if manifest['source'] != signature:
+        manifest['source'] = signature
+        manifest['outputs'] = {}
+    manifest['outputs'][os.path.basename(path)] = phash
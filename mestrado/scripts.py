@@ -3,6 +3,8 @@
 
 import chbmit
 import argline
+import benchmark
+import os
 import sys
 
 
@@ -22,7 +24,11 @@ def execDatasetFileVerifier():
     print "Iniciando verificação de arquivos."
 
     print "Verificando Base: CHBMIT."
-    chbmit.verifyCHBMITFiles()
+    sp = argline.OUTPUTDIR if argline.OUTPUTDIR else '.'
+    good_data = chbmit.verifyCHBMITFiles(
+        jobs=argline.JOBS,
+        report_path=os.path.join(sp, 'chbmit_verification.csv'))
+    print "good-data = {}".format(",".join(good_data))
 
     print "Verificação Concluída!"
 
@@ -35,4 +41,46 @@ def execFourier():
 
     print "Executando base de dados CHBMIT."
     sp = argline.OUTPUTDIR if argline.OUTPUTDIR else '.'
-    chbmit.applyFourier(patients='good', save_path=sp, exec_mode='full')
+    chbmit.applyFourier(patients='good', save_path=sp, exec_mode='full',
+                        jobs=argline.JOBS,
+                        index_path=os.path.join(sp, 'chbmit_metadata.json'))
+
+
+def execDatasetIndex():
+    """Cria (ou atualiza) o índice de metadados das bases de dados.
+
+    O índice é salvo em 'chbmit_metadata.json' no diretório de saída e
+    utilizado pelos demais scripts, evitando percorrer a base de dados.
+    """
+    argline.config()
+
+    print "Criando índice de metadados: CHBMIT."
+    sp = argline.OUTPUTDIR if argline.OUTPUTDIR else '.'
+    metadata = chbmit.buildCHBMITMetadata(
+        patients='all', index_path=os.path.join(sp, 'chbmit_metadata.json'))
+
+    seizure_files = chbmit.queryCHBMITMetadata(metadata, with_seizures=True)
+    print "Pacientes: {}".format(len(metadata['patients']))
+    print "Arquivos com crises: {}".format(len(seizure_files))
+
+    print "Índice Concluído!"
+
+
+def execBenchmark():
+    """Mede o desempenho da STFT e do espectro de potência (sinal sintético).
+
+    Os tempos são salvos em 'benchmark.json' no diretório de saída e
+    comparados com a execução anterior, se existir.
+    """
+    argline.config()
+
+    print "Iniciando medidas de desempenho."
+    sp = argline.OUTPUTDIR if argline.OUTPUTDIR else '.'
+    results = benchmark.runBenchmarks()
+    regressions = benchmark.saveBenchmarks(results,
+                                           os.path.join(sp, 'benchmark.json'))
+
+    for name, ratio in sorted(regressions.items()):
+        print "Regressão: {} ({:.2f}x)".format(name, ratio)
+
+    print "Medidas Concluídas!"
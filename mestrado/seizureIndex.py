@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import numpy as np
+
+
+class SeizureIndex(object):
+    """Índice de intervalos ordenados das crises, para consultas temporais.
+
+    Os intervalos de cada arquivo (ou de qualquer chave, e.g., uma linha do
+    tempo contínua de um paciente) são unidos, quando sobrepostos, e
+    armazenados em vetores ordenados de início e término. Como os intervalos
+    resultantes são disjuntos, ambos os vetores são crescentes e todas as
+    consultas são resolvidas por busca binária (*np.searchsorted*), em tempo
+    logarítmico, de forma vetorizada para vetores de tempos.
+
+    Parâmetros:
+    -----------
+    annot_dict: dict (default: None)
+        anotações no formato de *chbmit.summaryFileParser*. Cada arquivo EDF
+        (fname) é adicionado como uma chave do índice.
+
+    Nota:
+    -----
+    Chaves sem crises registradas são tratadas como sinais sem crises: as
+    consultas de sobreposição retornam False e as distâncias retornam
+    infinito (np.inf).
+    Arquivos podem ser registrados como trechos do eixo de tempo de uma
+    chave (ver *addFile*), permitindo consultas que atravessam os limites
+    entre arquivos consecutivos.
+    """
+
+    def __init__(self, annot_dict=None):
+        self._starts = {}
+        self._ends = {}
+        self._files = {}
+
+        if annot_dict is not None:
+            for fname, annot in annot_dict.items():
+                self.add(fname, annot['annot_start'], annot['annot_end'])
+
+    def add(self, key, starts, ends):
+        """Adiciona (ou substitui) os intervalos das crises de uma chave.
+
+        Parâmetros:
+        -----------
+        key: hashable
+            identificação dos intervalos (e.g., nome do arquivo EDF).
+        starts, ends: list de float
+            inícios e términos das crises (em segundos).
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        if starts.shape != ends.shape or np.any(ends < starts):
+            errormsg = ("Intervalos de crises inválidos para {}: {}, {}"
+                        "".format(key, starts, ends))
+            logging.error(errormsg)
+            raise ValueError(errormsg)
+
+        order = np.argsort(starts, kind='mergesort')
+        starts, ends = starts[order], ends[order]
+
+        # une os intervalos sobrepostos (ou adjacentes)
+        if len(starts) > 1:
+            ends = np.maximum.accumulate(ends)
+            new = np.concatenate(([True], starts[1:] > ends[:-1]))
+            last = np.concatenate((np.nonzero(new)[0][1:]-1, [len(ends)-1]))
+            starts, ends = starts[new], ends[last]
+
+        self._starts[key] = starts
+        self._ends[key] = ends
+
+    def addFile(self, fname, key, offset):
+        """Registra um arquivo como trecho do eixo de tempo de uma chave.
+
+        Parâmetros:
+        -----------
+        fname: str
+            nome do arquivo EDF.
+        key: hashable
+            chave do eixo de tempo (e.g., rótulo do paciente).
+        offset: float
+            início do arquivo no eixo de tempo da chave (em segundos).
+        """
+        self._files[fname] = (key, float(offset))
+
+    def locate(self, fname):
+        """Retorna a chave e o início (em segundos) de um arquivo no eixo de
+        tempo da chave. Arquivos não registrados (ver *addFile*) são a
+        própria chave, com início zero."""
+        return self._files.get(fname, (fname, 0.0))
+
+    def keys(self):
+        """Retorna as chaves registradas no índice."""
+        return self._starts.keys()
+
+    def seizures(self, key):
+        """Retorna os intervalos (unidos) de uma chave, como (inícios,
+        términos)."""
+        empty = np.zeros(0)
+        return self._starts.get(key, empty), self._ends.get(key, empty)
+
+    def overlaps(self, key, tmin, tmax):
+        """Verifica se os intervalos [tmin, tmax) se sobrepõem a alguma crise.
+
+        Parâmetros:
+        -----------
+        key: hashable
+            chave dos intervalos.
+        tmin, tmax: float|np.ndarray
+            inícios e términos dos intervalos consultados (em segundos).
+
+        Retorno:
+        --------
+        np.ndarray (bool):
+            True para os intervalos que se sobrepõem a alguma crise.
+        """
+        starts, ends = self.seizures(key)
+        tmin = np.asarray(tmin, dtype=np.float64)
+        tmax = np.asarray(tmax, dtype=np.float64)
+        if len(starts) == 0:
+            return np.zeros(np.broadcast(tmin, tmax).shape, dtype=bool)
+
+        # primeira crise que termina após tmin
+        i = np.searchsorted(ends, tmin, side='right')
+        valid = i < len(starts)
+        return valid & (starts[np.minimum(i, len(starts)-1)] < tmax)
+
+    def timeToNext(self, key, t):
+        """Retorna o tempo até o início da próxima crise (np.inf se não
+        houver), a partir dos tempos *t* (em segundos)."""
+        starts, _ = self.seizures(key)
+        t = np.asarray(t, dtype=np.float64)
+        j = np.searchsorted(starts, t, side='right')
+        padded = np.concatenate((starts, [np.inf]))
+        return padded[j] - t
+
+    def timeSinceLast(self, key, t):
+        """Retorna o tempo desde o término da última crise (np.inf se não
+        houver), a partir dos tempos *t* (em segundos)."""
+        _, ends = self.seizures(key)
+        t = np.asarray(t, dtype=np.float64)
+        k = np.searchsorted(ends, t, side='right')
+        padded = np.concatenate(([-np.inf], ends))
+        return t - padded[k]
+
+    def distance(self, key, t):
+        """Retorna a distância (em segundos) dos tempos *t* até a crise mais
+        próxima. Tempos durante uma crise possuem distância zero."""
+        starts, ends = self.seizures(key)
+        t = np.asarray(t, dtype=np.float64)
+        if len(starts) == 0:
+            return np.full(t.shape, np.inf)
+
+        # primeira crise que não terminou antes de t
+        i = np.searchsorted(ends, t, side='left')
+        inside = (i < len(starts)) & \
+            (starts[np.minimum(i, len(starts)-1)] <= t)
+        dist = np.minimum(self.timeToNext(key, t), self.timeSinceLast(key, t))
+        return np.where(inside, 0.0, dist)
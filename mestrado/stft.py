@@ -2,7 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import multiprocessing.pool
 import numpy as np
+import scipy.fftpack
 import scipy.signal
 
 
@@ -12,7 +14,9 @@ def stft(signal, wsize, hop):
     Parâmetros:
     -----------
     signal: array_like
-        sinal a ser processado.
+        sinal a ser processado. Pode conter uma dimensão (um único canal) ou
+        duas dimensões (canais, amostras), como *raw._data* da biblioteca
+        *mne*.
     wsize: int
         tamanho das janelas (em número de amostras).
     hop: int
@@ -20,42 +24,606 @@ def stft(signal, wsize, hop):
 
     Retorno:
     --------
-    (list, list):
+    (np.ndarray, np.ndarray):
         consiste em uma tupla de duas dimensões. A primeira dimensão contém os
         coeficientes da transformada (linha: janela; coluna:frequência). A
         segunda dimensão corresponde à amostra que a janela representa (centro
         da janela).
+
+    Nota:
+    -----
+    Caso *signal* possua duas dimensões, os coeficientes são retornados em um
+    vetor de três dimensões (canal, janela, frequência), calculados em uma
+    única chamada para todos os canais. Para utilizar o resultado em
+    *plotModels.plotSpectrum* (linhas: frequências; colunas: janelas), basta
+    transpor os dois últimos eixos, e.g. *abs(coef).transpose(0, 2, 1)*.
     """
     logging.debug("Calculando limites das janelas.")
+    signal = np.asarray(signal)
+    if signal.ndim not in (1, 2):
+        errormsg = ("O parâmetro 'signal' deve conter uma ou duas dimensões. "
+                    "Recebeu: {}".format(signal.ndim))
+        logging.error(errormsg)
+        raise ValueError(errormsg)
 
-    wleft = len(signal)-wsize+1  # limite máximo para índice inferior da janela
-    wright = len(signal)+1       # limite máximo para índice superior da janela
+    nwindows = _windowsCount(signal.shape[-1], wsize, hop)
 
-    left = range(0, wleft, hop)         # indices inferiores das janelas
-    right = range(wsize, wright, hop)   # indices superiores das janelas
+    # índices das janelas (amostra central de cada janela)
+    windex_list = np.arange(nwindows, dtype=float)*hop + wsize/2
 
-    csize = (wsize/2) + 1
-    windex_list = np.zeros(len(left))   # índices das janelas (amostra)
+    logging.debug("Criando janela gaussiana.")
+    g = scipy.signal.kaiser(wsize, 14)
+
+    logging.debug("Calculando STFT de {} janelas.".format(nwindows))
+    frames = _frameSignal(signal, wsize, hop, nwindows)
 
     # Armazena os coeficientes da STFT.
-    # Cada linha corresponde aos coeficientes de uma janela
-    stft_coef = np.zeros((len(left), csize), dtype=complex)
+    # Cada linha corresponde aos coeficientes de uma janela (por canal, caso
+    # o sinal possua mais de uma dimensão)
+    stft_coef = np.fft.rfft(frames*g, axis=-1)
+
+    return stft_coef, windex_list
+
+
+class STFTPlan(object):
+    """Plano de execução reutilizável da STFT para uma configuração fixa.
+
+    Pré-calcula e armazena, uma única vez, a janela de Kaiser, a disposição
+    das janelas (índices das amostras centrais) e as frequências (ver
+    *stftfreq*) para uma configuração (wsize, hop, nsamples). O plano pode
+    então ser executado repetidamente sobre sinais de mesmo tamanho,
+    escrevendo os coeficientes em um vetor pré-alocado (*out*), de forma que
+    execuções sucessivas praticamente não alocam memória.
+
+    Parâmetros:
+    -----------
+    nsamples: int
+        número de amostras dos sinais que serão processados.
+    wsize: int
+        tamanho das janelas (em número de amostras).
+    hop: int
+        número de amostras para deslocamento entre janelas.
+    sfreq: float (default: None)
+        frequência de amostragem do sinal (em Hertz). Caso None, o atributo
+        *freq* não é calculado.
+    block_size: int (default: 1024)
+        número de janelas transformadas por vez. Limita o tamanho dos vetores
+        temporários utilizados durante a execução.
+
+    Atributos:
+    ----------
+    window: np.ndarray
+        janela de Kaiser utilizada (beta=14).
+    nwindows: int
+        número de janelas por sinal.
+    windex_list: np.ndarray
+        amostras centrais das janelas. Não deve ser modificado.
+    freq: np.ndarray|None
+        frequências correspondentes aos coeficientes (ver *stftfreq*).
+    """
 
+    def __init__(self, nsamples, wsize, hop, sfreq=None, block_size=1024):
+        logging.debug("Criando plano de STFT: nsamples={}, wsize={}, hop={}"
+                      "".format(nsamples, wsize, hop))
+        self.nsamples = nsamples
+        self.wsize = wsize
+        self.hop = hop
+        self.sfreq = sfreq
+        self.block_size = block_size
+
+        self.nwindows = _windowsCount(nsamples, wsize, hop)
+        self.ncoef = wsize//2 + 1
+        self.windex_list = (np.arange(self.nwindows, dtype=float)*hop +
+                            wsize/2)
+        self.window = scipy.signal.kaiser(wsize, 14)
+        self.freq = stftfreq(wsize, sfreq) if sfreq is not None else None
+
+        # vetor de trabalho para as janelas multiplicadas pela janela de Kaiser
+        self._work = np.empty((min(block_size, self.nwindows), wsize))
+
+    def outputShape(self, nchannels=None):
+        """Retorna o formato do vetor de coeficientes gerado pelo plano.
+
+        Parâmetros:
+        -----------
+        nchannels: int (default: None)
+            número de canais do sinal. Caso None, considera um único canal
+            (sinal de uma dimensão).
+        """
+        if nchannels is None:
+            return (self.nwindows, self.ncoef)
+        return (nchannels, self.nwindows, self.ncoef)
+
+    def allocate(self, nchannels=None):
+        """Aloca um vetor de saída compatível com *execute*."""
+        return np.empty(self.outputShape(nchannels), dtype=complex)
+
+    def execute(self, signal, out=None):
+        """Executa a STFT do plano sobre *signal*.
+
+        Parâmetros:
+        -----------
+        signal: array_like
+            sinal com *nsamples* amostras, de uma dimensão ou de duas
+            dimensões (canais, amostras).
+        out: np.ndarray (default: None)
+            vetor complexo pré-alocado para os coeficientes (ver *allocate*).
+            Caso None, um novo vetor é alocado.
+
+        Retorno:
+        --------
+        (np.ndarray, np.ndarray):
+            coeficientes da STFT (*out*) e amostras centrais das janelas, no
+            mesmo formato de *stft.stft*.
+        """
+        signal = np.asarray(signal)
+        if signal.ndim not in (1, 2) or signal.shape[-1] != self.nsamples:
+            errormsg = ("Sinal incompatível com o plano de STFT. Esperado: "
+                        "(..., {}). Recebeu: {}"
+                        "".format(self.nsamples, signal.shape))
+            logging.error(errormsg)
+            raise ValueError(errormsg)
+
+        nchannels = signal.shape[0] if signal.ndim == 2 else None
+        shape = self.outputShape(nchannels)
+        if out is None:
+            out = self.allocate(nchannels)
+        elif out.shape != shape:
+            errormsg = ("Vetor de saída com formato inválido. Esperado: {}. "
+                        "Recebeu: {}".format(shape, out.shape))
+            logging.error(errormsg)
+            raise ValueError(errormsg)
+
+        frames = _frameSignal(signal, self.wsize, self.hop, self.nwindows)
+        if nchannels is None:
+            frames = frames[np.newaxis]
+            coef = out[np.newaxis]
+        else:
+            coef = out
+
+        logging.debug("Executando plano de STFT.")
+        for ch in range(frames.shape[0]):
+            for lb in range(0, self.nwindows, self.block_size):
+                rb = min(lb+self.block_size, self.nwindows)
+                work = self._work[:rb-lb]
+                np.multiply(frames[ch, lb:rb], self.window, out=work)
+                coef[ch, lb:rb] = np.fft.rfft(work, axis=-1)
+
+        return out, self.windex_list
+
+
+class SlidingDFT(object):
+    """STFT incremental por meio da DFT deslizante (Sliding DFT).
+
+    Alternativa a *stft.stft* para deslocamentos pequenos (*hop* igual a 1 ou
+    poucas amostras) e monitoramento em tempo quase real. A cada nova
+    amostra, os coeficientes da DFT da janela são atualizados de forma
+    recursiva em O(wsize), ao invés de uma FFT completa por janela. Para
+    limitar o acúmulo de erros numéricos da recursão, os coeficientes são
+    recalculados com uma FFT completa a cada *resync* amostras.
+
+    A janela de Kaiser (beta=14) de *stft.stft* é aplicada no domínio da
+    frequência, pela convolução dos coeficientes com o espectro da janela.
+    Apenas os termos do espectro da janela com magnitude relativa maior que
+    *tol* são utilizados, de forma que os coeficientes diferem dos de
+    *stft.stft* por um erro relativo da ordem de *tol*. As frequências seguem
+    a convenção de *stftfreq*. A obtenção dos coeficientes de uma janela
+    (ver *coefficients*) custa O(ntaps*wsize), sendo ntaps o número de termos
+    utilizados; para *tol* grande, ntaps é pequeno e o custo é menor que o de
+    uma FFT completa por janela.
+
+    Parâmetros:
+    -----------
+    wsize: int
+        tamanho das janelas (em número de amostras).
+    hop: int (default: 1)
+        número de amostras para deslocamento entre janelas retornadas por
+        *feed*.
+    resync: int (default: 4096)
+        número de amostras entre recálculos completos (FFT) dos coeficientes.
+    tol: float (default: 1e-6)
+        magnitude relativa mínima dos termos do espectro da janela utilizados
+        na convolução. Com tol=0, todos os termos são utilizados.
+    """
+
+    def __init__(self, wsize, hop=1, resync=4096, tol=1e-6):
+        logging.debug("Criando DFT deslizante: wsize={}, hop={}, resync={}"
+                      "".format(wsize, hop, resync))
+        self.wsize = wsize
+        self.hop = hop
+        self.resync = resync
+        self.ncoef = wsize//2 + 1
+
+        k = np.arange(wsize)
+        self._twiddle = np.exp(2j*np.pi*k/wsize)
+
+        # termos significativos do espectro da janela (convolução circular)
+        wspec = np.fft.fft(scipy.signal.kaiser(wsize, 14))/wsize
+        taps = np.where(np.abs(wspec) > tol*np.abs(wspec[0]))[0]
+        self._weights = wspec[taps]
+        # índices dos coeficientes combinados por termo: (ntaps, ncoef)
+        k = np.arange(self.ncoef)
+        self._gather = (k[np.newaxis, :] - taps[:, np.newaxis]) % wsize
+        logging.debug("Termos da janela utilizados: {}".format(len(taps)))
+
+        self.reset()
+
+    def reset(self):
+        """Descarta as amostras recebidas, reiniciando a DFT deslizante."""
+        self._ring = np.zeros(self.wsize)   # últimas *wsize* amostras
+        self._pos = 0                       # posição da amostra mais antiga
+        self._coef = np.zeros(self.wsize, dtype=complex)
+        self._count = 0                     # amostras recebidas
+        self._since_sync = 0
+
+    def _synchronize(self):
+        """Recalcula os coeficientes com uma FFT completa da janela atual."""
+        self._coef = np.fft.fft(np.roll(self._ring, -self._pos))
+        self._since_sync = 0
+
+    def update(self, sample):
+        """Insere uma nova amostra, deslocando a janela em uma amostra."""
+        old = self._ring[self._pos]
+        self._ring[self._pos] = sample
+        self._pos = (self._pos + 1) % self.wsize
+        self._count += 1
+        self._since_sync += 1
+
+        if self._since_sync >= self.resync:
+            self._synchronize()
+        else:
+            self._coef += sample - old
+            self._coef *= self._twiddle
+
+    def coefficients(self):
+        """Retorna os coeficientes da janela atual (janela de Kaiser).
+
+        Retorno:
+        --------
+        np.ndarray:
+            coeficientes correspondentes às frequências de *stftfreq*, para
+            as últimas *wsize* amostras recebidas.
+        """
+        return self._weights.dot(self._coef[self._gather])
+
+    def feed(self, samples):
+        """Insere um bloco de amostras, retornando as janelas completadas.
+
+        As janelas são as mesmas de *stft.stft* aplicada ao sinal completo
+        (todas as amostras recebidas desde a criação ou *reset*).
+
+        Parâmetros:
+        -----------
+        samples: array_like
+            novas amostras do sinal (uma dimensão).
+
+        Retorno:
+        --------
+        (np.ndarray, np.ndarray):
+            coeficientes das janelas completadas por este bloco e suas
+            amostras centrais, no formato de *stft.stft*.
+        """
+        coef_list = []
+        windex_list = []
+        for sample in np.asarray(samples, dtype=float):
+            self.update(sample)
+            lb = self._count - self.wsize   # início da janela atual
+            if lb >= 0 and lb % self.hop == 0:
+                coef_list.append(self.coefficients())
+                windex_list.append(lb + self.wsize/2)
+
+        stft_coef = np.array(coef_list, dtype=complex).reshape(-1, self.ncoef)
+        return stft_coef, np.array(windex_list, dtype=float)
+
+
+def stftChunks(chunks, wsize, hop):
+    """Calcula a STFT de um sinal recebido em blocos, na forma de um gerador.
+
+    Versão incremental de *stft.stft* para sinais que não cabem em memória,
+    como gravações longas concatenadas ou blocos lidos de um arquivo EDF. A
+    cada bloco recebido, as janelas completas são transformadas e retornadas.
+    As últimas amostras do bloco, necessárias para as janelas seguintes
+    (sobreposição de *wsize - hop* amostras), são mantidas para o próximo
+    bloco. O resultado concatenado é idêntico ao de *stft.stft* aplicado ao
+    sinal completo.
+
+    Parâmetros:
+    -----------
+    chunks: iterável de array_like
+        blocos sucessivos do sinal. Cada bloco pode conter uma dimensão (um
+        único canal) ou duas dimensões (canais, amostras). Todos os blocos
+        devem possuir o mesmo número de canais.
+    wsize: int
+        tamanho das janelas (em número de amostras).
+    hop: int
+        número de amostras para deslocamento entre janelas.
+
+    Retorno:
+    --------
+    gerador de (np.ndarray, np.ndarray):
+        para cada bloco, uma tupla com os coeficientes das janelas completadas
+        e os índices (amostra central, em relação ao início do sinal) dessas
+        janelas, no mesmo formato de *stft.stft*. Blocos que não completam
+        nenhuma janela não geram saída.
+    """
     logging.debug("Criando janela gaussiana.")
     g = scipy.signal.kaiser(wsize, 14)
 
-    for index, (lb, rb) in enumerate(zip(left, right)):
-        wi = (lb+rb)/2
-        windex_list[index] = wi
+    carry = None    # amostras remanescentes do bloco anterior
+    offset = 0      # amostra (absoluta) correspondente ao início de *carry*
+    skip = 0        # amostras a descartar antes da próxima janela (hop>wsize)
 
-        logging.debug(("Calculando STFT da janela {} [{}:{}]"
-                       "".format(wi, lb, rb)))
+    for index, chunk in enumerate(chunks):
+        chunk = np.asarray(chunk)
+        logging.debug("Recebendo bloco {} com {} amostras."
+                      "".format(index, chunk.shape[-1]))
 
-        window = [i*j for i, j in zip(g, signal[lb:rb])]
-        wi_coef = np.fft.rfft(window)
-        stft_coef[index] = wi_coef
+        if skip > 0:
+            nskip = min(skip, chunk.shape[-1])
+            chunk = chunk[..., nskip:]
+            skip -= nskip
+            offset += nskip
 
-    return stft_coef, windex_list
+        if carry is None or carry.shape[-1] == 0:
+            buf = chunk
+        else:
+            buf = np.concatenate((carry, chunk), axis=-1)
+
+        nwindows = _windowsCount(buf.shape[-1], wsize, hop)
+        if nwindows > 0:
+            frames = _frameSignal(buf, wsize, hop, nwindows)
+            stft_coef = np.fft.rfft(frames*g, axis=-1)
+            windex_list = (np.arange(nwindows, dtype=float)*hop + wsize/2 +
+                           offset)
+
+            logging.debug("Bloco {}: {} janelas calculadas."
+                          "".format(index, nwindows))
+            yield stft_coef, windex_list
+
+        # mantém apenas as amostras a partir do início da próxima janela
+        consumed = nwindows*hop
+        if consumed > buf.shape[-1]:
+            skip = consumed - buf.shape[-1]
+            consumed = buf.shape[-1]
+        carry = buf[..., consumed:].copy()
+        offset += consumed
+
+
+def stftPower(signal, wsize, hop, bands=None, sfreq=None, block_size=1024):
+    """Calcula o espectro de potência da STFT (|X|^2) em precisão simples.
+
+    Variante de *stft.stft* que armazena apenas a potência dos coeficientes,
+    como float32 (4 bytes por coeficiente, ao invés de 16 bytes do complexo).
+    Opcionalmente, cada janela é reduzida diretamente à soma da potência em
+    cada banda de frequência, sem que o espectrograma completo seja criado.
+    As janelas são transformadas em blocos de *block_size* janelas, limitando
+    o tamanho dos vetores temporários.
+
+    Parâmetros:
+    -----------
+    signal: array_like
+        sinal a ser processado, com uma dimensão ou duas dimensões (canais,
+        amostras).
+    wsize: int
+        tamanho das janelas (em número de amostras).
+    hop: int
+        número de amostras para deslocamento entre janelas.
+    bands: list de (float, float|None) (default: None)
+        lista de bandas de frequência (em Hertz) na forma (fmin, fmax). Cada
+        banda contém as frequências fmin <= f < fmax. Caso fmax seja None, a
+        banda se estende até a última frequência. Caso None, a potência de
+        todas as frequências é retornada.
+    sfreq: float (default: None)
+        frequência de amostragem do sinal (em Hertz). Necessária quando
+        *bands* é utilizado.
+    block_size: int (default: 1024)
+        número de janelas transformadas por vez.
+
+    Retorno:
+    --------
+    (np.ndarray, np.ndarray):
+        potência (float32) com formato (..., janela, frequência), ou
+        (..., janela, banda) caso *bands* seja utilizado, e as amostras
+        centrais das janelas, como em *stft.stft*.
+    """
+    signal = np.asarray(signal)
+    if signal.ndim not in (1, 2):
+        errormsg = ("O parâmetro 'signal' deve conter uma ou duas dimensões. "
+                    "Recebeu: {}".format(signal.ndim))
+        logging.error(errormsg)
+        raise ValueError(errormsg)
+
+    band_slices = None
+    if bands is not None:
+        if sfreq is None:
+            errormsg = ("O parâmetro 'sfreq' é necessário para calcular a "
+                        "potência por bandas.")
+            logging.error(errormsg)
+            raise ValueError(errormsg)
+        band_slices = bandSlices(stftfreq(wsize, sfreq), bands)
+
+    nwindows = _windowsCount(signal.shape[-1], wsize, hop)
+    windex_list = np.arange(nwindows, dtype=float)*hop + wsize/2
+
+    logging.debug("Criando janela gaussiana.")
+    g = scipy.signal.kaiser(wsize, 14)
+
+    ncol = len(band_slices) if bands is not None else wsize//2 + 1
+    power = np.empty(signal.shape[:-1] + (nwindows, ncol), dtype=np.float32)
+
+    logging.debug("Calculando potência da STFT de {} janelas."
+                  "".format(nwindows))
+    frames = _frameSignal(signal, wsize, hop, nwindows)
+    for lb in range(0, nwindows, block_size):
+        rb = min(lb+block_size, nwindows)
+        coef = np.fft.rfft(frames[..., lb:rb, :]*g, axis=-1)
+        block = np.square(coef.real, dtype=np.float32)
+        block += np.square(coef.imag, dtype=np.float32)
+
+        if band_slices is None:
+            power[..., lb:rb, :] = block
+        else:
+            for index, (ws, wf) in enumerate(band_slices):
+                power[..., lb:rb, index] = block[..., ws:wf].sum(axis=-1)
+
+    return power, windex_list
+
+
+def bandSlices(freq, bands, tol=1e-7):
+    """Converte bandas de frequência (em Hertz) em intervalos de índices.
+
+    Parâmetros:
+    -----------
+    freq: array_like
+        frequências em ordem crescente (ver *stftfreq*).
+    bands: list de (float, float|None)
+        lista de bandas na forma (fmin, fmax). Cada banda contém as
+        frequências fmin <= f < fmax. Caso fmax seja None, a banda se estende
+        até a última frequência.
+    tol: float (default: 1e-7)
+        tolerância (em Hertz) na comparação com os limites das bandas, para
+        absorver erros de arredondamento de *freq*.
+
+    Retorno:
+    --------
+    list de (int, int):
+        lista com os índices (início, fim) de cada banda em *freq*, para uso
+        como *freq[ws:wf]*.
+    """
+    freq = np.asarray(freq)
+    slices = []
+    for fmin, fmax in bands:
+        ws = int(np.searchsorted(freq, fmin-tol, side='left'))
+        if fmax is None:
+            wf = len(freq)
+        else:
+            wf = int(np.searchsorted(freq, fmax-tol, side='left'))
+        slices.append((ws, wf))
+    return slices
+
+
+def powerSpectrum(signals, sfreq, pad=True, threads=1, out=None):
+    """Calcula o espectro de potência de sinais completos, em precisão simples.
+
+    Calcula a transformada de Fourier (rfft) de cada canal e o espectro de
+    potência (|X|^2) em uma única matriz float32 pré-alocada, com uma linha
+    por canal e uma linha adicional para a média dos canais. Como a
+    transformada é linear, o espectro da média é obtido a partir da soma das
+    transformadas dos canais, sem uma passagem adicional sobre o sinal. As
+    transformadas dos canais são distribuídas entre *threads* threads.
+
+    Parâmetros:
+    -----------
+    signals: array_like
+        sinais com formato (canais, amostras), como *raw._data*.
+    sfreq: float
+        frequência de amostragem do sinal (em Hertz).
+    pad: True|False (default: True)
+        se True, os sinais são completados com zeros até o próximo tamanho
+        eficiente para a FFT (ver *scipy.fftpack.next_fast_len*). As
+        frequências retornadas correspondem ao tamanho completado.
+    threads: int (default: 1)
+        número de threads utilizadas no cálculo das transformadas.
+    out: np.ndarray (default: None)
+        matriz float32 pré-alocada com formato (canais+1, frequências). Caso
+        None, uma nova matriz é alocada.
+
+    Retorno:
+    --------
+    (np.ndarray, np.ndarray, int):
+        espectros de potência (linha: canal, seguido da média; coluna:
+        frequência), frequências correspondentes e número de pontos da
+        transformada (nfft).
+    """
+    signals = np.asarray(signals)
+    nchannels, nsamples = signals.shape
+
+    nfft = scipy.fftpack.next_fast_len(nsamples) if pad else nsamples
+    ncoef = nfft//2 + 1
+    logging.debug("Calculando espectro de potência: {} amostras, nfft={}."
+                  "".format(nsamples, nfft))
+
+    shape = (nchannels+1, ncoef)
+    if out is None:
+        out = np.empty(shape, dtype=np.float32)
+    elif out.shape != shape or out.dtype != np.float32:
+        errormsg = ("Vetor de saída inválido. Esperado: {} (float32). "
+                    "Recebeu: {} ({})".format(shape, out.shape, out.dtype))
+        logging.error(errormsg)
+        raise ValueError(errormsg)
+
+    def transform(channels):
+        """Calcula a potência de *channels*, retornando a soma dos coefs."""
+        acc = np.zeros(ncoef, dtype=complex)
+        for ch in channels:
+            ft = np.fft.rfft(signals[ch], n=nfft)
+            np.square(ft.real, out=out[ch], casting='same_kind')
+            out[ch] += np.square(ft.imag)
+            acc += ft
+        return acc
+
+    # canais distribuídos entre as threads (numpy libera o GIL na FFT)
+    threads = max(1, min(threads, nchannels))
+    groups = [range(i, nchannels, threads) for i in range(threads)]
+    if threads > 1:
+        pool = multiprocessing.pool.ThreadPool(threads)
+        try:
+            acc_list = pool.map(transform, groups)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        acc_list = [transform(groups[0])]
+
+    avg_ft = sum(acc_list)/nchannels
+    np.square(avg_ft.real, out=out[-1], casting='same_kind')
+    out[-1] += np.square(avg_ft.imag)
+
+    freq = np.fft.rfftfreq(nfft, d=1.0/sfreq)
+    return out, freq, nfft
+
+
+def _windowsCount(nsamples, wsize, hop):
+    """Retorna o número de janelas completas que cabem em *nsamples* amostras.
+    """
+    if nsamples < wsize:
+        return 0
+    return (nsamples-wsize)//hop + 1
+
+
+def _frameSignal(signal, wsize, hop, nwindows=None):
+    """Retorna as janelas do sinal como uma visão (sem cópia) do vetor.
+
+    Constrói, por meio de *strides*, uma matriz em que cada linha corresponde
+    a uma janela de *wsize* amostras, deslocadas de *hop* amostras. Nenhum
+    dado é copiado: a matriz retornada compartilha a memória de *signal* e,
+    portanto, não deve ser modificada.
+
+    Parâmetros:
+    -----------
+    signal: np.ndarray
+        sinal a ser dividido em janelas. As janelas são extraídas do último
+        eixo.
+    wsize: int
+        tamanho das janelas (em número de amostras).
+    hop: int
+        número de amostras para deslocamento entre janelas.
+    nwindows: int (default: None)
+        número de janelas. Caso None, é calculado a partir de *signal*.
+
+    Retorno:
+    --------
+    np.ndarray:
+        visão de *signal* com formato (..., janelas, wsize).
+    """
+    if nwindows is None:
+        nwindows = _windowsCount(signal.shape[-1], wsize, hop)
+
+    step = signal.strides[-1]
+    shape = signal.shape[:-1] + (nwindows, wsize)
+    strides = signal.strides[:-1] + (step*hop, step)
+    return np.lib.stride_tricks.as_strided(signal, shape=shape,
+                                           strides=strides)
 
 
 def stftfreq(wsize, sfreq):